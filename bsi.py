@@ -1,11 +1,16 @@
 import os
+import shutil
+import tempfile
+import time
+from collections import defaultdict
 from datetime import datetime
-from functools import wraps
+from functools import lru_cache, wraps
 from io import BytesIO, StringIO
 
 from flask import (
     Flask,
-    render_template_string,
+    abort,
+    render_template,
     request,
     redirect,
     url_for,
@@ -14,14 +19,19 @@ from flask import (
     send_file,
     jsonify,
 )
+from flask_compress import Compress
 from flask_sqlalchemy import SQLAlchemy
+from markupsafe import Markup, escape
 from datetime import timezone, timedelta
 WIB = timezone(timedelta(hours=7))
 
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
-from sqlalchemy import func, text
+from sqlalchemy import case, delete, false, func, insert, literal, literal_column, null, text, tuple_, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased, load_only, raiseload, selectinload, undefer
 
 # ============================================================
 # LOAD ENV (.env)
@@ -38,8 +48,11 @@ app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-secret")
 app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["MAX_CONTENT_LENGTH"] = 2 * 1024 * 1024  # safety limit for uploads
+# HTML/JSON didominasi markup statis; brotli dulu, gzip untuk klien lama
+app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
 
 db = SQLAlchemy(app)
+Compress(app)
 
 # ============================================================
 # DATABASE MODELS
@@ -122,6 +135,13 @@ class Ticket(db.Model):
 
     messages = db.relationship("TicketMessage", backref="ticket", lazy="dynamic")
 
+    __table_args__ = (
+        # Daftar tiket user / filter status admin, urut created_at tanpa sort terpisah
+        db.Index("ix_ticket_user_created", "user_id", "created_at"),
+        db.Index("ix_ticket_status_created", "status", "created_at"),
+        db.Index("ix_ticket_assigned_admin", "assigned_admin_id"),
+    )
+
 
 
 class TicketMessage(db.Model):
@@ -137,6 +157,14 @@ class TicketMessage(db.Model):
 
     sender = db.relationship("User")
 
+    __table_args__ = (
+        # Hitung pesan belum dibaca per tiket (GROUP BY ticket_id) langsung dari index
+        db.Index("ix_ticket_messages_unread_user", "ticket_id", "is_read_user", "sender_id"),
+        db.Index("ix_ticket_messages_unread_admin", "ticket_id", "is_read_admin", "sender_id"),
+        # Polling chat: pesan baru per tiket (ticket_id = ? AND id > since ORDER BY id)
+        db.Index("ix_ticket_messages_ticket_id", "ticket_id", "id"),
+    )
+
 
 class StudentRecord(db.Model):
     """
@@ -158,7 +186,8 @@ class StudentRecord(db.Model):
     file_name = db.Column(db.String(255))
     file_mime = db.Column(db.String(100))
     file_size = db.Column(db.Integer)
-    file_data = db.Column(db.LargeBinary)
+    # Deferred: isi file tidak ikut di-SELECT saat listing; hanya dimuat di route download
+    file_data = db.deferred(db.Column(db.LargeBinary))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     user = db.relationship("User", backref="records")
@@ -180,12 +209,23 @@ class ProgramForm(db.Model):
     url = db.Column(db.String(500))  # Tautan form eksternal (jika ada)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    created_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True, index=True)
 
     created_by_user = db.relationship(
         "User", backref="program_forms", foreign_keys=[created_by]
     )
 
+    __table_args__ = (
+        # Keyset pagination daftar form (created_at DESC, id DESC); INCLUDE kolom yang
+        # ditampilkan supaya daftar bisa dilayani index-only scan
+        db.Index(
+            "ix_program_forms_list",
+            created_at.desc(),
+            id.desc(),
+            postgresql_include=["title", "slug", "icon", "url", "is_active"],
+        ),
+    )
+
 
 class Post(db.Model):
     """
@@ -204,11 +244,20 @@ class Post(db.Model):
     is_published = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     created_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    # Counter denormalisasi, dijaga atomik oleh route news_* (lihat _bump_post_counter)
+    like_count = db.Column(db.Integer, default=0)
+    dislike_count = db.Column(db.Integer, default=0)
+    registration_count = db.Column(db.Integer, default=0)
 
     created_by_user = db.relationship(
         "User", backref="posts", foreign_keys=[created_by]
     )
 
+    __table_args__ = (
+        # Feed news: filter is_published, urut created_at DESC
+        db.Index("ix_posts_published_created", "is_published", created_at.desc()),
+    )
+
 
 class PostRegistration(db.Model):
     """
@@ -224,6 +273,13 @@ class PostRegistration(db.Model):
 
     user = db.relationship("User")
     post = db.relationship("Post")
+
+    __table_args__ = (
+        # Satu pendaftaran per user per post; juga index lookup "sudah daftar?"
+        db.Index("ix_post_registrations_post_user", "post_id", "user_id", unique=True),
+    )
+
+
 class PostComment(db.Model):
     """
     Komentar pada postingan, mendukung balasan (thread sederhana).
@@ -236,12 +292,20 @@ class PostComment(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     parent_id = db.Column(db.Integer, db.ForeignKey("post_comments.id"), nullable=True)
     content = db.Column(db.Text, nullable=False)
+    # HTML siap tampil (escape + <br>), diisi sekali saat komentar ditulis
+    content_html = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     post = db.relationship("Post", backref="comments")
     user = db.relationship("User")
     parent = db.relationship("PostComment", remote_side=[id], backref="replies")
 
+    # FK komposit (parent_id, post_id) -> (id, post_id): parent harus komentar pada post yang
+    # sama; dibuat di run_migrations (fk_post_comments_parent)
+    __table_args__ = (
+        db.Index("ix_post_comments_post_created", "post_id", "created_at"),
+    )
+
 
 class PostReaction(db.Model):
     """
@@ -259,6 +323,11 @@ class PostReaction(db.Model):
     post = db.relationship("Post", backref="reactions")
     user = db.relationship("User")
 
+    __table_args__ = (
+        # Satu reaksi per user per post
+        db.Index("ix_post_reactions_post_user", "post_id", "user_id", unique=True),
+    )
+
 
 class PostBookmark(db.Model):
     """
@@ -275,6 +344,10 @@ class PostBookmark(db.Model):
     post = db.relationship("Post", backref="bookmarks")
     user = db.relationship("User")
 
+    __table_args__ = (
+        db.Index("ix_post_bookmarks_post_user", "post_id", "user_id", unique=True),
+    )
+
 
 
 
@@ -298,36 +371,126 @@ def set_setting(key: str, value: str) -> None:
     db.session.commit()
 
 
-def log_action(user_id: int | None, action: str, detail: str = "") -> None:
+def log_action(user_id: int | None, action: str, detail: str = "", commit: bool = True) -> None:
+    """Catat aktivitas. commit=False: hanya add ke session, ikut commit pemanggil."""
     db.session.add(ActivityLog(user_id=user_id, action=action, detail=detail))
-    db.session.commit()
+    if commit:
+        db.session.commit()
 
 
 def current_user():
     uid = session.get("user_id")
     if not uid:
         return None
-    return User.query.get(uid)
+    return db.session.get(User, uid)
 
 def format_ticket_number(ticket: "Ticket") -> str:
     """Generate human-readable ticket number: YYYYMMDD + 3-digit increment.
     Date uses GMT+7 (WIB) based on ticket.created_at.
     """
-    dt = ticket.created_at
-    if dt is None:
-        dt = datetime.now(WIB)
+    if ticket.created_at is None:
+        return f"{datetime.now(WIB).strftime('%Y%m%d')}{ticket.id:03d}"
+    return _ticket_number(ticket.id, ticket.created_at)
+
+
+@lru_cache(maxsize=4096)
+def _ticket_number(ticket_id: int, created_at: datetime) -> str:
+    # Deterministik per (id, created_at); dipanggil per baris di beberapa halaman + export
+    return f"{_to_wib(created_at).strftime('%Y%m%d')}{ticket_id:03d}"
+
+
+# Singkatan bulan sama dengan output strftime("%b") (locale C), tanpa parsing format
+_MON_ID = ("", "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+_WIB_DELTA = timedelta(hours=7)
+
+
+def _to_wib(dt: datetime) -> datetime:
+    """Konversi ke WIB. Kolom DateTime disimpan naive UTC (datetime.utcnow),
+    cukup ditambah offset tanpa lookup tzinfo."""
+    return dt + _WIB_DELTA if dt.tzinfo is None else dt.astimezone(WIB)
+
+
+def _fmt_dmy(dt: datetime) -> str:
+    """Format tanggal WIB sebagai 'DD Mon YYYY' (setara strftime("%d %b %Y"))."""
+    dt = _to_wib(dt)
+    return f"{dt.day:02d} {_MON_ID[dt.month]} {dt.year}"
+
+
+@lru_cache(maxsize=4096)
+def _fmt_wib(dt: datetime, fmt: str = "%d %b %Y, %H:%M") -> str:
+    """strftime dalam WIB, di-memo per (timestamp, format)."""
+    return _to_wib(dt).strftime(fmt)
+
+
+def _wib_year_bounds(year: str):
+    """Rentang [awal, akhir) naive UTC untuk satu tahun kalender WIB; None jika bukan tahun 4 digit."""
+    if len(year) != 4 or not year.isdigit():
+        return None
+    try:
+        y = int(year)
+        return datetime(y, 1, 1) - _WIB_DELTA, datetime(y + 1, 1, 1) - _WIB_DELTA
+    except (ValueError, OverflowError):
+        return None
+
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def read_upload(file, limit: int, keep: bool = True) -> bytes | None:
+    """Baca FileStorage per chunk 64 KB, maksimal `limit` byte.
+    None jika file lebih besar; header Content-Length part (jika ada) dicek lebih dulu.
+    keep=False: hanya cek ukuran — isi tidak disimpan (hasil b""), stream dikembalikan ke awal.
+    """
+    if file.content_length and file.content_length > limit:
+        return None
+    chunks = []
+    total = 0
+    while True:
+        buf = file.stream.read(UPLOAD_CHUNK_SIZE)
+        if not buf:
+            break
+        total += len(buf)
+        if total > limit:
+            return None
+        if keep:
+            chunks.append(buf)
+    if not keep:
+        file.stream.seek(0)
+    return b"".join(chunks)
+
+
+XLSX_MEMORY_LIMIT = 8 * 1024 * 1024
+
+
+def send_xlsx(wb, filename: str):
+    """Kirim workbook openpyxl sebagai download .xlsx.
+    File ≤ 8 MB dikirim dari BytesIO (tetap di memori); lebih besar sudah di-spool ke file temp
+    di disk, yang fileno()-nya dipakai wsgi.file_wrapper / sendfile oleh server.
+    """
+    tmp = tempfile.SpooledTemporaryFile(max_size=XLSX_MEMORY_LIMIT)
+    wb.save(tmp)
+    size = tmp.tell()
+    tmp.seek(0)
+    if size <= XLSX_MEMORY_LIMIT:
+        # SpooledTemporaryFile akan rollover ke disk begitu file_wrapper memanggil fileno()
+        out = BytesIO(tmp.read())
+        tmp.close()
     else:
-        try:
-            dt = dt.astimezone(WIB)
-        except Exception:
-            try:
-                from datetime import timezone as _tz
-                dt = dt.replace(tzinfo=_tz.utc).astimezone(WIB)
-            except Exception:
-                pass
-    prefix = dt.strftime("%Y%m%d")
-    return f"{prefix}{ticket.id:03d}"
+        out = tmp
+    resp = send_file(
+        out,
+        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        as_attachment=True,
+        download_name=filename,
+        conditional=True,
+    )
+    resp.content_length = size
+    return resp
+
 
+def _wib_char(column, fmt: str):
+    """Ekspresi SQL: format kolom naive UTC sebagai teks WIB di sisi Postgres (to_char)."""
+    return func.to_char(func.timezone("Asia/Jakarta", func.timezone("UTC", column)), fmt)
 
 
 # ============================================================
@@ -1496,12 +1659,15 @@ BASE_HTML = """
     }
 
     // Ticket chat state & helpers
-    window.__ticketChatState = { ticketId: null, ticketNo: '', poll: null };
+    window.__ticketChatState = { ticketId: null, ticketNo: '', poll: null, lastId: 0 };
 
     window.openTicketChat = function(ticketId, ticketNo) {
       var st = window.__ticketChatState;
       st.ticketId = ticketId;
       st.ticketNo = ticketNo || '';
+      st.lastId = 0;
+      var box = document.getElementById('chat-messages');
+      if (box) box.innerHTML = '';
       var titleEl = document.getElementById('chat-ticket-number');
       if (titleEl) {
         titleEl.textContent = ticketNo ? ('Ticket ' + ticketNo) : '';
@@ -1526,13 +1692,19 @@ BASE_HTML = """
     window.loadTicketMessages = function() {
       var st = window.__ticketChatState;
       if (!st.ticketId) return;
-      fetch('/ticket/' + st.ticketId + '/messages')
+      var ticketId = st.ticketId;
+      // Hanya minta pesan setelah id terakhir yang sudah ditampilkan
+      fetch('/ticket/' + ticketId + '/messages?since=' + st.lastId)
         .then(function(r) { return r.json(); })
         .then(function(list) {
           var box = document.getElementById('chat-messages');
-          if (!box) return;
-          box.innerHTML = '';
+          if (!box || st.ticketId !== ticketId) return;
+          var added = false;
           (list || []).forEach(function(m) {
+            // Lewati pesan yang sudah ditambahkan oleh polling lain yang bersamaan
+            if (m.id <= st.lastId) return;
+            st.lastId = m.id;
+            added = true;
             var wrapper = document.createElement('div');
             wrapper.className = 'chat-bubble ' + (m.me ? 'me' : 'other');
             var sender = document.createElement('div');
@@ -1549,7 +1721,7 @@ BASE_HTML = """
             wrapper.appendChild(time);
             box.appendChild(wrapper);
           });
-          box.scrollTop = box.scrollHeight;
+          if (added) box.scrollTop = box.scrollHeight;
         })
         .catch(function(err) { console && console.warn && console.warn(err); });
     };
@@ -1708,17 +1880,41 @@ BASE_HTML = """
 """
 
 
+def _compile_template(source: str):
+    # Dipanggil sekali saat import; render_template_string meng-compile ulang setiap request
+    return app.jinja_env.from_string(source)
+
+
+BASE_TMPL = _compile_template(BASE_HTML)
+
+
 def render_page(body_html: str, **context):
     user = current_user()
     admin_mode = request.path.startswith("/admin")
 
-    return render_template_string(BASE_HTML, admin_mode=admin_mode,
+    # Template object tetap lewat render_template (context processor & signal Flask)
+    return render_template(BASE_TMPL, admin_mode=admin_mode,
         body=body_html,
         user=user,
         **context,
     )
 
 
+@lru_cache(maxsize=None)
+def _endpoint_url(endpoint: str, script_root: str) -> str:
+    return url_for(endpoint)
+
+
+def cached_url(endpoint: str) -> str:
+    """url_for untuk endpoint tanpa argumen, di-memo per endpoint (tanpa URL map build tiap request)."""
+    return _endpoint_url(endpoint, request.script_root)
+
+
+def render_body(template, **context) -> str:
+    """Render template body halaman (sudah di-compile, autoescape aktif) untuk render_page."""
+    return template.render(**context)
+
+
 # ============================================================
 # STATIC MENU ITEMS (DASAR) UNTUK MAHASISWA
 # ============================================================
@@ -1791,8 +1987,8 @@ def register():
             flash("Konfirmasi password tidak sama.", "danger")
             return redirect(url_for("register"))
 
-        existing = User.query.filter_by(email=email).first()
-        if existing:
+        # Cek keberadaan saja: ambil id, bukan seluruh baris user
+        if db.session.query(User.id).filter_by(email=email).first() is not None:
             flash("Email sudah terdaftar. Silakan masuk.", "danger")
             return redirect(url_for("login"))
 
@@ -2139,16 +2335,16 @@ def profile():
 
     ticket_history_rows = ""
     for t in tickets_all:
-        created = t.created_at.astimezone(WIB).strftime("%d %b %Y, %H:%M") if t.created_at else "-"
-        updated = t.updated_at.astimezone(WIB).strftime("%d %b %Y, %H:%M") if t.updated_at else "-"
-        status_label = t.status.replace("_", " ").title()
+        created = _fmt_wib(t.created_at) if t.created_at else "-"
+        updated = _fmt_wib(t.updated_at) if t.updated_at else "-"
+        status_label = TICKET_STATUS_LABEL.get(t.status, t.status)
         last_note = (t.admin_note or "").splitlines()[-1] if t.admin_note else "-"
         ticket_no = format_ticket_number(t)
         ticket_history_rows += f"""<tr>
           <td>{ticket_no}</td>
-          <td>{t.title}</td>
+          <td>{escape(t.title)}</td>
           <td><span class='badge badge-status-{t.status}'>{status_label}</span></td>
-          <td>{last_note}</td>
+          <td>{escape(last_note)}</td>
           <td>{created}</td>
           <td>{updated}</td>
         </tr>"""
@@ -2156,23 +2352,11 @@ def profile():
     ongoing_tickets = [t for t in tickets_all if t.status in ("open", "in_progress")]
 
     ongoing_cards = ""
-    steps = ["open", "in_progress", "resolved", "closed"]
     for t in ongoing_tickets:
-        created = t.created_at.astimezone(WIB).strftime("%d %b %Y, %H:%M") if t.created_at else "-"
+        created = _fmt_wib(t.created_at) if t.created_at else "-"
         ticket_no = format_ticket_number(t)
-        status_label = t.status.replace("_", " ").title()
-        # build timeline
-        current_index = steps.index(t.status) if t.status in steps else 0
-        steps_html = ""
-        for idx, s in enumerate(steps):
-            label = s.replace("_", " ").title()
-            if idx < current_index:
-                cls = "done"
-            elif idx == current_index:
-                cls = "current"
-            else:
-                cls = "future"
-            steps_html += f"<div class='ticket-step ticket-step-{cls}'><div class='ticket-step-dot'></div><div class='ticket-step-label'>{label}</div></div>"
+        status_label = TICKET_STATUS_LABEL.get(t.status, t.status)
+        steps_html = _ticket_timeline_html(TICKET_STEP_INDEX.get(t.status, 0))
 
         short_desc = (t.description or "").strip().replace("\n", " ")
         if len(short_desc) > 160:
@@ -2181,13 +2365,13 @@ def profile():
         ongoing_cards += f"""<div class='ticket-card'>
           <div class='ticket-card-header'>
             <div>
-              <div class='ticket-title'>#{ticket_no} — {t.title}</div>
+              <div class='ticket-title'>#{ticket_no} — {escape(t.title)}</div>
               <div class='ticket-meta'>Dibuat: {created}</div>
             </div>
             <div class='ticket-status-pill status-{t.status}'>{status_label}</div>
           </div>
           <div class='ticket-body'>
-            <p>{short_desc}</p>
+            <p>{escape(short_desc)}</p>
           </div>
           <div class='ticket-timeline'>
             {steps_html}
@@ -2549,11 +2733,11 @@ def profile_record_add():
             flash("Format file tidak diizinkan. Hanya jpg, jpeg, png, atau pdf.", "danger")
             return redirect(url_for("profile"))
 
-        data = file.read()
-        size = len(data or b"")
-        if size > 1 * 1024 * 1024:
+        data = read_upload(file, 1 * 1024 * 1024)
+        if data is None:
             flash("Ukuran file maksimal 1 MB.", "danger")
             return redirect(url_for("profile"))
+        size = len(data)
 
         file_name = filename
         file_mime = file.mimetype or "application/octet-stream"
@@ -2600,7 +2784,7 @@ def profile_record_delete(record_id: int):
 @login_required
 def record_file(record_id: int):
     user = current_user()
-    rec = StudentRecord.query.get_or_404(record_id)
+    rec = StudentRecord.query.options(undefer(StudentRecord.file_data)).get_or_404(record_id)
     if rec.user_id != user.id and (not user or user.role != "admin"):
         flash("Anda tidak berhak mengakses lampiran ini.", "danger")
         return redirect(url_for("profile"))
@@ -2621,79 +2805,99 @@ def record_file(record_id: int):
 # ============================================================
 
 
-@app.route("/admin/users")
-@login_required
-@admin_required
-def admin_users():
-    users = User.query.order_by(User.created_at.desc()).all()
-
-    # Hitung aktivitas terakhir tiap user
-    for u in users:
-        last_log = ActivityLog.query.filter_by(user_id=u.id).order_by(ActivityLog.created_at.desc()).first()
-        if last_log and last_log.created_at:
-            u._last_active = last_log.created_at.astimezone(WIB).strftime("%d %b %Y, %H:%M")
-        else:
-            u._last_active = "-"
-
-    table_rows = ""
-    for u in users:
-        status_badge = (
-            "<span class='badge badge-status-active'>Aktif</span>"
-            if u.is_active
-            else "<span class='badge badge-status-inactive'>Nonaktif</span>"
-        )
-        role_badge = (
-            "<span class='badge badge-role-admin'>Admin</span>"
-            if u.role == "admin"
-            else "<span class='badge badge-role-user'>User</span>"
-        )
-        created = u.created_at.astimezone(WIB).strftime("%d %b %Y") if u.created_at else ""
-        table_rows += f"""
+_ADMIN_USER_ROW_TMPL = """
         <tr>
-          <td>{u.full_name}</td>
-          <td>{u.email}</td>
-          <td>{u.student_id or '-'}</td>
-          <td>{u.campus or '-'}</td>
-          <td>{u.major or '-'}</td>
+          <td>{full_name}</td>
+          <td>{email}</td>
+          <td>{student_id}</td>
+          <td>{campus}</td>
+          <td>{major}</td>
           <td>{role_badge}</td>
           <td>{status_badge}</td>
           <td>{created}</td>
-          <td><a href='{url_for('admin_user_edit', user_id=u.id)}' style='color:#0055a5;'>Kelola</a></td>
-          <td>{u._last_active}</td>
-          <td><a href='{url_for('admin_user_logs', user_id=u.id)}' style='color:#0055a5;'>Riwayat</a></td>
+          <td><a href='{edit_url}' style='color:#0055a5;'>Kelola</a></td>
+          <td>{last_active}</td>
+          <td><a href='{logs_url}' style='color:#0055a5;'>Riwayat</a></td>
         </tr>
         """
 
-    mobile_cards = ""
-    for u in users:
-        status_text = "Aktif" if u.is_active else "Nonaktif"
-        status_class = "badge-status-active" if u.is_active else "badge-status-inactive"
-        role_class = "badge-role-admin" if u.role == "admin" else "badge-role-user"
-        created = u.created_at.astimezone(WIB).strftime("%d %b %Y") if u.created_at else ""
-        campus = u.campus or "-"
-        mobile_cards += f"""
+_ADMIN_USER_CARD_TMPL = """
         <div class="admin-card">
           <div class="admin-card-top">
             <div>
-              <div class="admin-card-name">{u.full_name}</div>
-              <div class="admin-card-email">{u.email}</div>
+              <div class="admin-card-name">{full_name}</div>
+              <div class="admin-card-email">{email}</div>
               <div class="admin-card-email" style="margin-top:0.1rem;">Kampus: {campus}</div>
             </div>
             <div style="display:flex; flex-direction:column; gap:0.25rem; align-items:flex-end;">
-              <span class="badge {role_class}">{u.role.title()}</span>
+              <span class="badge {role_class}">{role_title}</span>
               <span class="badge {status_class}">{status_text}</span>
             </div>
           </div>
           <div class="admin-card-meta">
-            <span>NIM: {u.student_id or '-'}</span>
+            <span>NIM: {student_id}</span>
             <span style="font-size:0.72rem;">{created}</span>
           </div>
           <div class="admin-card-actions" style="margin-top:0.25rem;">
-            <a href="{url_for('admin_user_edit', user_id=u.id)}">Kelola akun</a>
+            <a href="{edit_url}">Kelola akun</a>
           </div>
         </div>
         """
 
+
+@app.route("/admin/users")
+@login_required
+@admin_required
+def admin_users():
+    users_q = User.query
+    if app.debug:
+        # Saat development, akses relasi yang tidak di-eager-load langsung error (cegah N+1)
+        users_q = users_q.options(raiseload("*"))
+    users = users_q.order_by(User.created_at.desc()).all()
+
+    # Aktivitas terakhir semua user dalam satu query agregat
+    last_by_user = dict(
+        db.session.query(ActivityLog.user_id, func.max(ActivityLog.created_at))
+        .group_by(ActivityLog.user_id)
+        .all()
+    )
+
+    table_parts, mobile_parts = [], []
+    for u in users:
+        last = last_by_user.get(u.id)
+        row = {
+            "full_name": u.full_name,
+            "email": u.email,
+            "student_id": u.student_id or "-",
+            "campus": u.campus or "-",
+            "major": u.major or "-",
+            "created": _fmt_dmy(u.created_at) if u.created_at else "",
+            "last_active": _to_wib(last).strftime("%d %b %Y, %H:%M") if last else "-",
+            "edit_url": url_for("admin_user_edit", user_id=u.id),
+            "logs_url": url_for("admin_user_logs", user_id=u.id),
+            "role_title": u.role.title(),
+        }
+        if u.is_active:
+            row["status_badge"] = "<span class='badge badge-status-active'>Aktif</span>"
+            row["status_text"] = "Aktif"
+            row["status_class"] = "badge-status-active"
+        else:
+            row["status_badge"] = "<span class='badge badge-status-inactive'>Nonaktif</span>"
+            row["status_text"] = "Nonaktif"
+            row["status_class"] = "badge-status-inactive"
+        if u.role == "admin":
+            row["role_badge"] = "<span class='badge badge-role-admin'>Admin</span>"
+            row["role_class"] = "badge-role-admin"
+        else:
+            row["role_badge"] = "<span class='badge badge-role-user'>User</span>"
+            row["role_class"] = "badge-role-user"
+
+        table_parts.append(_ADMIN_USER_ROW_TMPL.format_map(row))
+        mobile_parts.append(_ADMIN_USER_CARD_TMPL.format_map(row))
+
+    table_rows = "".join(table_parts)
+    mobile_cards = "".join(mobile_parts)
+
     body = f"""
     <div class=\"surface\">
       <div class=\"page-header\">
@@ -2739,6 +2943,29 @@ def admin_users():
     return render_page(body, title="Admin - Users", active_nav="admin_users")
 
 
+@lru_cache(maxsize=256)
+def _user_log_items_html(user_id: int, last_ts: datetime) -> str:
+    """Render 30 log terakhir user sebagai <li>.
+    Cache dikunci oleh timestamp log terbaru, jadi otomatis basi saat ada log baru.
+    """
+    rows = (
+        db.session.query(ActivityLog.created_at, ActivityLog.action, ActivityLog.detail)
+        .filter_by(user_id=user_id)
+        .order_by(ActivityLog.created_at.desc())
+        .limit(30)
+        .all()
+    )
+    # Tuple kolom, bukan objek ORM: tanpa descriptor lookup per atribut
+    return "".join([
+        f"<li style='font-size:0.78rem;margin-bottom:0.25rem;'><strong>{ts}</strong> • {escape(action)}"
+        f"{f' — {escape(detail)}' if detail else ''}</li>"
+        for ts, action, detail in (
+            (_to_wib(created_at).strftime("%d %b %Y, %H:%M") if created_at else "-", action, detail)
+            for created_at, action, detail in rows
+        )
+    ])
+
+
 @app.route("/admin/users/<int:user_id>", methods=["GET", "POST"])
 @login_required
 @admin_required
@@ -2785,19 +3012,8 @@ def admin_user_edit(user_id: int):
         .order_by(ActivityLog.created_at.desc())
         .first()
     )
-    last_access_str = last_log.created_at.astimezone(WIB).strftime("%d %b %Y, %H:%M") if last_log else "-"
-    logs = (
-        ActivityLog.query.filter_by(user_id=user_obj.id)
-        .order_by(ActivityLog.created_at.desc())
-        .limit(30)
-        .all()
-    )
-
-    log_items = ""
-    for lg in logs:
-        ts = lg.created_at.astimezone(WIB).strftime("%d %b %Y, %H:%M") if lg.created_at else "-"
-        detail = f" — {lg.detail}" if lg.detail else ""
-        log_items += f"<li style='font-size:0.78rem;margin-bottom:0.25rem;'><strong>{ts}</strong> • {lg.action}{detail}</li>"
+    last_access_str = _to_wib(last_log.created_at).strftime("%d %b %Y, %H:%M") if last_log else "-"
+    log_items = _user_log_items_html(user_obj.id, last_log.created_at) if last_log else ""
 
     body = f"""
     <div class=\"surface\">
@@ -2807,7 +3023,7 @@ def admin_user_edit(user_id: int):
           <p class=\"page-subtitle\">Edit data, role, status akun, dan lihat riwayat aktivitas user.</p>
         </div>
         <div style=\"display:flex;gap:0.5rem;\">
-          <a href=\"{url_for('admin_users')}\" class=\"btn btn-ghost\">Kembali ke Daftar User</a>
+          <a href=\"{cached_url('admin_users')}\" class=\"btn btn-ghost\">Kembali ke Daftar User</a>
         </div>
       </div>
 
@@ -2965,9 +3181,12 @@ def admin_settings():
 def admin_overview():
     total_mahasiswa = User.query.filter_by(role="user").count()
     total_admin = User.query.filter_by(role="admin").count()
-    total_records = StudentRecord.query.count()
-    total_prestasi = StudentRecord.query.filter_by(record_type="prestasi").count()
-    total_kegiatan = StudentRecord.query.filter_by(record_type="kegiatan").count()
+    # Satu SELECT aggregate; Query.count() membungkus subquery berisi semua kolom entity
+    total_records, total_prestasi, total_kegiatan = db.session.query(
+        func.count(StudentRecord.id),
+        func.count(StudentRecord.id).filter(StudentRecord.record_type == "prestasi"),
+        func.count(StudentRecord.id).filter(StudentRecord.record_type == "kegiatan"),
+    ).one()
 
     top_prestasi = (
         db.session.query(User, func.count(StudentRecord.id).label("cnt"))
@@ -2996,23 +3215,26 @@ def admin_overview():
         .all()
     )
 
-    list_top_prestasi = ""
-    for idx, (u, cnt) in enumerate(top_prestasi, start=1):
-        list_top_prestasi += f"<li style='font-size:0.8rem;margin-bottom:0.2rem;'>{idx}. {u.full_name} — <strong>{cnt} prestasi</strong> ({u.campus or '-'})</li>"
+    list_top_prestasi = "".join(
+        f"<li style='font-size:0.8rem;margin-bottom:0.2rem;'>{idx}. {u.full_name} — <strong>{cnt} prestasi</strong> ({u.campus or '-'})</li>"
+        for idx, (u, cnt) in enumerate(top_prestasi, start=1)
+    )
 
-    list_top_kegiatan = ""
-    for idx, (u, cnt) in enumerate(top_kegiatan, start=1):
-        list_top_kegiatan += f"<li style='font-size:0.8rem;margin-bottom:0.2rem;'>{idx}. {u.full_name} — <strong>{cnt} kegiatan</strong> ({u.campus or '-'})</li>"
+    list_top_kegiatan = "".join(
+        f"<li style='font-size:0.8rem;margin-bottom:0.2rem;'>{idx}. {u.full_name} — <strong>{cnt} kegiatan</strong> ({u.campus or '-'})</li>"
+        for idx, (u, cnt) in enumerate(top_kegiatan, start=1)
+    )
 
-    list_skills = ""
+    skill_parts = []
     for u in skill_users:
         skills_text = (u.skills or "").replace("\n", " / ")
-        list_skills += f"""
+        skill_parts.append(f"""
         <li style="font-size:0.8rem;margin-bottom:0.4rem;">
           <strong>{u.full_name}</strong> ({u.campus or '-'})<br>
           <span style="font-size:0.75rem;color:var(--text-muted);">{skills_text}</span>
         </li>
-        """
+        """)
+    list_skills = "".join(skill_parts)
 
     body = f"""
     <div class=\"surface\">
@@ -3029,7 +3251,7 @@ def admin_overview():
           <div class=\"kpi-value\">{total_mahasiswa}</div>
           <div class=\"kpi-sub\">Klik untuk lihat data detail portofolio</div>
         </div>
-        <div class=\"card kpi-card kpi-2\" onclick=\"window.location.href='{url_for('admin_users')}'\" style=\"cursor:pointer;\">
+        <div class=\"card kpi-card kpi-2\" onclick=\"window.location.href='{cached_url('admin_users')}'\" style=\"cursor:pointer;\">
           <div class=\"card-title\">Total Admin</div>
           <div class=\"kpi-value\">{total_admin}</div>
           <div class=\"kpi-sub\">Klik untuk kelola akun admin</div>
@@ -3066,6 +3288,21 @@ def admin_overview():
     return render_page(body, title="Admin Dashboard", active_nav="admin_overview")
 
 
+_RAW_DATA_ROW_TMPL = """
+        <tr>
+          <td>{full_name}</td>
+          <td>{campus}</td>
+          <td>{record_type}</td>
+          <td>{title}</td>
+          <td>{level}</td>
+          <td>{year}</td>
+          <td>{organizer}</td>
+          <td>{lampiran}</td>
+          <td>{created}</td>
+        </tr>
+        """
+
+
 @app.route("/admin/raw-data")
 @login_required
 @admin_required
@@ -3074,6 +3311,8 @@ def admin_raw_data():
     rtype = request.args.get("record_type", "").strip()
 
     base_q = db.session.query(StudentRecord, User).join(User, StudentRecord.user_id == User.id)
+    if app.debug:
+        base_q = base_q.options(raiseload("*"))
     if year:
         base_q = base_q.filter(StudentRecord.year == year)
     if rtype:
@@ -3081,31 +3320,31 @@ def admin_raw_data():
 
     records = base_q.order_by(StudentRecord.created_at.desc()).all()
 
-    total_records = StudentRecord.query.count()
-    total_prestasi = StudentRecord.query.filter_by(record_type="prestasi").count()
-    total_kegiatan = StudentRecord.query.filter_by(record_type="kegiatan").count()
+    # Satu SELECT aggregate; Query.count() membungkus subquery berisi semua kolom entity
+    total_records, total_prestasi, total_kegiatan = db.session.query(
+        func.count(StudentRecord.id),
+        func.count(StudentRecord.id).filter(StudentRecord.record_type == "prestasi"),
+        func.count(StudentRecord.id).filter(StudentRecord.record_type == "kegiatan"),
+    ).one()
 
-    rows = ""
+    row_parts = []
     for rec, u in records:
-        created = rec.created_at.astimezone(WIB).strftime("%d %b %Y") if rec.created_at else ""
-        lampiran = ""
         if rec.file_name:
             lampiran = f"<a href='{url_for('record_file', record_id=rec.id)}' style='font-size:0.75rem;'>📎 Lihat</a>"
         else:
             lampiran = "-"
-        rows += f"""
-        <tr>
-          <td>{u.full_name}</td>
-          <td>{u.campus or '-'}</td>
-          <td>{rec.record_type.title()}</td>
-          <td>{rec.title}</td>
-          <td>{rec.level or '-'}</td>
-          <td>{rec.year or '-'}</td>
-          <td>{rec.organizer or '-'}</td>
-          <td>{lampiran}</td>
-          <td>{created}</td>
-        </tr>
-        """
+        row_parts.append(_RAW_DATA_ROW_TMPL.format_map({
+            "full_name": u.full_name,
+            "campus": u.campus or "-",
+            "record_type": rec.record_type.title(),
+            "title": rec.title,
+            "level": rec.level or "-",
+            "year": rec.year or "-",
+            "organizer": rec.organizer or "-",
+            "lampiran": lampiran,
+            "created": _fmt_dmy(rec.created_at) if rec.created_at else "",
+        }))
+    rows = "".join(row_parts)
 
     body = f"""
     <div class=\"surface\">
@@ -3204,7 +3443,7 @@ def admin_raw_data_export():
     ws.append(header)
 
     for rec, u in records:
-        created = rec.created_at.astimezone(WIB).strftime("%Y-%m-%d %H:%M:%S") if rec.created_at else ""
+        created = _to_wib(rec.created_at).strftime("%Y-%m-%d %H:%M:%S") if rec.created_at else ""
         row = [
             u.full_name or "",
             u.campus or "",
@@ -3217,16 +3456,7 @@ def admin_raw_data_export():
         ]
         ws.append(row)
 
-    mem = BytesIO()
-    wb.save(mem)
-    mem.seek(0)
-    filename = "bsi_scholarship_portofolio.xlsx"
-    return send_file(
-        mem,
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        as_attachment=True,
-        download_name=filename,
-    )
+    return send_xlsx(wb, "bsi_scholarship_portofolio.xlsx")
 
 
 
@@ -3238,41 +3468,20 @@ def admin_raw_data_export():
 
 
 
-@app.route("/admin/users/<int:user_id>/logs")
-@login_required
-@admin_required
-def admin_user_logs(user_id: int):
-    user_obj = User.query.get_or_404(user_id)
-    logs = (
-        ActivityLog.query.filter_by(user_id=user_obj.id)
-        .order_by(ActivityLog.created_at.desc())
-        .limit(100)
-        .all()
-    )
-
-    log_items = ""
-    for log in logs:
-        when = log.created_at.astimezone(WIB).strftime("%d %b %Y, %H:%M") if log.created_at else ""
-        log_items += f"""<tr>
-          <td>{when}</td>
-          <td>{log.action}</td>
-          <td>{log.detail or '-'}</td>
-        </tr>"""
-
-    body = f"""
-    <div class=\"surface\">
-      <div class=\"page-header\">
+ADMIN_USER_LOGS_HTML = """
+    <div class="surface">
+      <div class="page-header">
         <div>
-          <h1 class=\"page-title\">Riwayat Aktivitas</h1>
-          <p class=\"page-subtitle\">Log aktivitas untuk {user_obj.full_name} ({user_obj.email}).</p>
+          <h1 class="page-title">Riwayat Aktivitas</h1>
+          <p class="page-subtitle">Log aktivitas untuk {{ user_obj.full_name }} ({{ user_obj.email }}).</p>
         </div>
         <div>
-          <a href=\"{url_for('admin_users')}\" class=\"btn btn-ghost\">Kembali ke Daftar User</a>
+          <a href="{{ back_url }}" class="btn btn-ghost">Kembali ke Daftar User</a>
         </div>
       </div>
 
-      <div class=\"table-surface\">
-        <div class=\"table-scroll\">
+      <div class="table-surface">
+        <div class="table-scroll">
           <table>
             <thead>
               <tr>
@@ -3281,109 +3490,160 @@ def admin_user_logs(user_id: int):
                 <th>Detail</th>
               </tr>
             </thead>
+            {%- if logs is none %}
+            <tbody id="user-logs-body"></tbody>
+            {%- else %}
             <tbody>
-              {log_items}
+              {%- for when, action, detail in logs %}
+              <tr>
+                <td>{{ when }}</td>
+                <td>{{ action }}</td>
+                <td>{{ detail }}</td>
+              </tr>
+              {%- endfor %}
             </tbody>
+            {%- endif %}
           </table>
         </div>
       </div>
+      {%- if logs is none %}
+      <noscript><p style="font-size:0.8rem;"><a href="{{ server_url }}">Tampilkan log tanpa JavaScript</a></p></noscript>
     </div>
-    """
-    return render_page(body, title="Riwayat Aktivitas User", active_nav="admin_users")
-
-@app.route("/admin/forms", methods=["GET", "POST"])
-@login_required
-@admin_required
-def admin_forms():
-    admin = current_user()
+    <script>
+    (function() {
+      var tbody = document.getElementById('user-logs-body');
+      var idle = window.requestIdleCallback || function(cb) { return setTimeout(cb, 1); };
+      fetch({{ logs_url|tojson }})
+        .then(function(r) { return r.json(); })
+        .then(function(list) {
+          var i = 0;
+          // Render bertahap 20 baris per idle callback supaya main thread tidak terblokir
+          function batch() {
+            var frag = document.createDocumentFragment();
+            list.slice(i, i + 20).forEach(function(row) {
+              var tr = document.createElement('tr');
+              [row.when, row.action, row.detail || '-'].forEach(function(val) {
+                var td = document.createElement('td');
+                td.textContent = val || '';
+                tr.appendChild(td);
+              });
+              frag.appendChild(tr);
+            });
+            tbody.appendChild(frag);
+            i += 20;
+            if (i < list.length) idle(batch);
+          }
+          idle(batch);
+        })
+        .catch(function(err) { console && console.warn && console.warn(err); });
+    })();
+    </script>
+      {%- else %}
+    </div>
+      {%- endif %}
+"""
+ADMIN_USER_LOGS_TMPL = _compile_template(ADMIN_USER_LOGS_HTML)
 
-    if request.method == "POST":
-        title = request.form.get("title", "").strip()
-        slug = request.form.get("slug", "").strip()
-        description = request.form.get("description", "").strip()
-        icon = request.form.get("icon", "").strip()
-        url_form = request.form.get("url", "").strip()
 
-        if not title or not slug:
-            flash("Judul dan slug wajib diisi.", "danger")
-            return redirect(url_for("admin_forms"))
+def _user_log_rows(user_id: int):
+    """(waktu WIB, aksi, detail) 100 log terbaru user, di-stream tanpa objek ORM."""
+    return (
+        db.session.query(
+            _wib_char(ActivityLog.created_at, "DD Mon YYYY, HH24:MI").label("when_str"),
+            ActivityLog.action,
+            ActivityLog.detail,
+        )
+        .filter_by(user_id=user_id)
+        .order_by(ActivityLog.created_at.desc())
+        .limit(100)
+        .execution_options(stream_results=True)
+        .yield_per(100)
+    )
 
-        existing = ProgramForm.query.filter_by(slug=slug).first()
-        if existing:
-            flash("Slug sudah digunakan, pilih slug lain.", "danger")
-            return redirect(url_for("admin_forms"))
 
-        pf = ProgramForm(
-            title=title,
-            slug=slug,
-            icon=icon or "📝",
-            description=description,
-            url=url_form,
-            is_active=True,
-            created_by=admin.id,
+@app.route("/admin/users/<int:user_id>/logs")
+@login_required
+@admin_required
+def admin_user_logs(user_id: int):
+    # Header hanya butuh nama & email; log hanya kolom yang ditampilkan
+    user_obj = (
+        db.session.query(User.full_name, User.email)
+        .filter(User.id == user_id)
+        .first_or_404()
+    )
+    context = dict(user_obj=user_obj, back_url=cached_url("admin_users"))
+    if request.args.get("render") == "server":
+        # Fallback tanpa JavaScript: tabel dirender di server
+        # Escape sekali di sini; nilai Markup tidak di-escape ulang oleh autoescape Jinja
+        context["logs"] = [
+            (
+                when_str or "",
+                escape(action),
+                escape(detail or "-"),
+            )
+            for when_str, action, detail in _user_log_rows(user_id)
+        ]
+    else:
+        # Default: hanya kerangka halaman, baris diambil browser dari logs.json
+        context.update(
+            logs=None,
+            logs_url=url_for("admin_user_logs_json", user_id=user_id),
+            server_url=url_for("admin_user_logs", user_id=user_id, render="server"),
         )
-        db.session.add(pf)
-        db.session.commit()
-        log_action(admin.id, "admin_add_form", slug)
-        flash("Form berhasil ditambahkan.", "success")
-        return redirect(url_for("admin_forms"))
 
-    forms = ProgramForm.query.order_by(ProgramForm.created_at.desc()).all()
+    body = render_body(ADMIN_USER_LOGS_TMPL, **context)
+    return render_page(body, title="Riwayat Aktivitas User", active_nav="admin_users")
 
-    rows = ""
-    for fobj in forms:
-        status = "Aktif" if fobj.is_active else "Nonaktif"
-        created = fobj.created_at.astimezone(WIB).strftime("%d %b %Y") if fobj.created_at else ""
-        rows += f"""
-        <tr>
-          <td>{fobj.title}</td>
-          <td>{fobj.slug}</td>
-          <td>{fobj.icon or ''}</td>
-          <td>{fobj.url or '-'}</td>
-          <td>{status}</td>
-          <td>{created}</td>
-        </tr>
-        """
 
-    body = f"""
-    <div class=\"surface\">
-      <div class=\"page-header\">
+@app.route("/admin/users/<int:user_id>/logs.json")
+@login_required
+@admin_required
+def admin_user_logs_json(user_id: int):
+    return jsonify([
+        {"when": when_str or "", "action": action, "detail": detail}
+        for when_str, action, detail in _user_log_rows(user_id)
+    ])
+
+
+ADMIN_FORMS_HTML = """
+    <div class="surface">
+      <div class="page-header">
         <div>
-          <h1 class=\"page-title\">Admin — Form & Tautan</h1>
-          <p class=\"page-subtitle\">Buat menu form dinamis (misalnya Google Form) yang akan muncul di Dashboard mahasiswa.</p>
+          <h1 class="page-title">Admin — Form & Tautan</h1>
+          <p class="page-subtitle">Buat menu form dinamis (misalnya Google Form) yang akan muncul di Dashboard mahasiswa.</p>
         </div>
       </div>
 
-      <div class=\"form-card\">
-        <h2 class=\"page-title\" style=\"font-size:1rem;\">Tambah Form Baru</h2>
-        <form method=\"post\" style=\"margin-top:0.6rem;\">
-          <div class=\"form-group\">
-            <label class=\"form-label\">Judul Form</label>
-            <input name=\"title\" class=\"form-input\" required>
+      <div class="form-card">
+        <h2 class="page-title" style="font-size:1rem;">Tambah Form Baru</h2>
+        <form method="post" style="margin-top:0.6rem;">
+          <div class="form-group">
+            <label class="form-label">Judul Form</label>
+            <input name="title" class="form-input" required>
           </div>
-          <div class=\"form-group\">
-            <label class=\"form-label\">Slug (unik, tanpa spasi)</label>
-            <input name=\"slug\" class=\"form-input\" placeholder=\"contoh: evaluasi-midline\" required>
-            <div class=\"form-help\">Slug akan digunakan pada URL internal: /form/&lt;slug&gt;</div>
+          <div class="form-group">
+            <label class="form-label">Slug (unik, tanpa spasi)</label>
+            <input name="slug" class="form-input" placeholder="contoh: evaluasi-midline" required>
+            <div class="form-help">Slug akan digunakan pada URL internal: /form/&lt;slug&gt;</div>
           </div>
-          <div class=\"form-group\">
-            <label class=\"form-label\">Emoji/Icon</label>
-            <input name=\"icon\" class=\"form-input\" placeholder=\"contoh: 📝\">
+          <div class="form-group">
+            <label class="form-label">Emoji/Icon</label>
+            <input name="icon" class="form-input" placeholder="contoh: 📝">
           </div>
-          <div class=\"form-group\">
-            <label class=\"form-label\">Deskripsi Singkat</label>
-            <input name=\"description\" class=\"form-input\" placeholder=\"Tampilkan tujuan form di kartu Dashboard.\">
+          <div class="form-group">
+            <label class="form-label">Deskripsi Singkat</label>
+            <input name="description" class="form-input" placeholder="Tampilkan tujuan form di kartu Dashboard.">
           </div>
-          <div class=\"form-group\">
-            <label class=\"form-label\">Tautan Form (opsional)</label>
-            <input name=\"url\" class=\"form-input\" placeholder=\"contoh: https://forms.gle/...\">
+          <div class="form-group">
+            <label class="form-label">Tautan Form (opsional)</label>
+            <input name="url" class="form-input" placeholder="contoh: https://forms.gle/...">
           </div>
-          <button class=\"btn btn-primary\" type=\"submit\">Simpan Form</button>
+          <button class="btn btn-primary" type="submit">Simpan Form</button>
         </form>
       </div>
 
-      <div class=\"table-surface\">
-        <div class=\"table-scroll\">
+      <div class="table-surface">
+        <div class="table-scroll">
           <table>
             <thead>
               <tr>
@@ -3396,136 +3656,252 @@ def admin_forms():
               </tr>
             </thead>
             <tbody>
-              {rows}
+              {%- for title, slug, icon, url, status, created in forms %}
+              <tr>
+                <td>{{ title }}</td>
+                <td>{{ slug }}</td>
+                <td>{{ icon }}</td>
+                <td>{{ url }}</td>
+                <td>{{ status }}</td>
+                <td>{{ created }}</td>
+              </tr>
+              {%- endfor %}
             </tbody>
           </table>
         </div>
       </div>
+      {%- if next_cursor %}
+      <div style="margin-top:0.8rem;text-align:center;">
+        <a href="{{ url_for('admin_forms', cursor=next_cursor) }}" class="btn btn-ghost btn-sm">Muat lebih banyak</a>
+      </div>
+      {%- endif %}
     </div>
-    """
-    return render_page(body, title="Admin - Forms", active_nav="admin_forms")
+"""
+ADMIN_FORMS_TMPL = _compile_template(ADMIN_FORMS_HTML)
 
+ADMIN_FORMS_PAGE_SIZE = 50
 
-# ============================================================
-# ADMIN - POSTINGAN KABAR & DOKUM
 
-@app.route("/tickets")
-@login_required
-def tickets():
-    user = current_user()
-    if not user:
-        return redirect(url_for("login"))
+def _parse_keyset_cursor(raw: str):
+    """Cursor keyset '<created_at iso>_<id>' → (datetime, int); None jika tidak valid."""
+    ts, _, fid = (raw or "").rpartition("_")
+    try:
+        return datetime.fromisoformat(ts), int(fid)
+    except ValueError:
+        return None
 
-    # Semua tiket user
-    tickets_all = (
-        Ticket.query.filter_by(user_id=user.id)
-        .order_by(Ticket.created_at.desc())
-        .all()
-    )
 
-    # Pisahkan tiket yang masih berjalan (open & in_progress)
-    ongoing_tickets = [t for t in tickets_all if t.status in ("open", "in_progress")]
+@lru_cache(maxsize=64)
+def _admin_forms_body(cursor, max_created: datetime, total: int) -> str:
+    """Render body daftar form untuk satu halaman keyset.
+    max_created & total hanya kunci cache; nilainya berubah saat ada form baru.
+    """
+    forms = (
+        db.session.query(
+            ProgramForm.title,
+            ProgramForm.slug,
+            # Default tampilan dihitung di SELECT, loop Python tanpa percabangan
+            func.coalesce(ProgramForm.icon, "").label("icon_str"),
+            func.coalesce(func.nullif(ProgramForm.url, ""), "-").label("url_str"),
+            case((ProgramForm.is_active, "Aktif"), else_="Nonaktif").label("status_str"),
+            func.coalesce(_wib_char(ProgramForm.created_at, "DD Mon YYYY"), "").label("created_str"),
+            ProgramForm.created_at,
+            ProgramForm.id,
+        )
+        .order_by(ProgramForm.created_at.desc(), ProgramForm.id.desc())
+    )
+    # Keyset pagination: lanjut dari baris terakhir halaman sebelumnya, bukan OFFSET
+    if cursor:
+        forms = forms.filter(tuple_(ProgramForm.created_at, ProgramForm.id) < cursor)
+    forms = forms.limit(ADMIN_FORMS_PAGE_SIZE + 1).all()
+
+    next_cursor = None
+    if len(forms) > ADMIN_FORMS_PAGE_SIZE:
+        forms = forms[:ADMIN_FORMS_PAGE_SIZE]
+        last = forms[-1]
+        if last.created_at:
+            next_cursor = f"{last.created_at.isoformat()}_{last.id}"
+
+    form_rows = [
+        (
+            escape(fobj.title),
+            escape(fobj.slug),
+            escape(fobj.icon_str),
+            escape(fobj.url_str),
+            fobj.status_str,
+            fobj.created_str,
+        )
+        for fobj in forms
+    ]
 
-    steps = ["open", "in_progress", "resolved", "closed"]
+    return render_body(ADMIN_FORMS_TMPL, forms=form_rows, next_cursor=next_cursor)
 
-    ongoing_cards = ""
-    for t in ongoing_tickets:
-        created = t.created_at.astimezone(WIB).strftime("%d %b %Y, %H:%M") if t.created_at else "-"
-        ticket_no = format_ticket_number(t)
-        status_label = t.status.replace("_", " ").title()
 
-        # timeline
-        current_index = steps.index(t.status) if t.status in steps else 0
-        steps_html = ""
-        for idx, s in enumerate(steps):
-            label = s.replace("_", " ").title()
-            if idx < current_index:
-                cls = "done"
-            elif idx == current_index:
-                cls = "current"
-            else:
-                cls = "future"
-            steps_html += f"<div class='ticket-step ticket-step-{cls}'><div class='ticket-step-dot'></div><div class='ticket-step-label'>{label}</div></div>"
+@app.route("/admin/forms", methods=["GET", "POST"])
+@login_required
+@admin_required
+def admin_forms():
+    admin = current_user()
 
-        short_desc = (t.description or "").strip().replace("\n", " ")
-        if len(short_desc) > 200:
-            short_desc = short_desc[:200] + "..."
+    if request.method == "POST":
+        title = request.form.get("title", "").strip()
+        slug = request.form.get("slug", "").strip()
+        description = request.form.get("description", "").strip()
+        icon = request.form.get("icon", "").strip()
+        url_form = request.form.get("url", "").strip()
 
-        ongoing_cards += f"""<div class='ticket-card'>
-      <div class='ticket-card-header'>
-        <div>
-          <div class='ticket-title'>#{ticket_no} — {t.title}</div>
-          <div class='ticket-meta'>Dibuat: {created}</div>
-        </div>
-        <div class='ticket-status-pill status-{t.status}'>{status_label}</div>
-      </div>
-      <div class='ticket-body'>
-        <p>{short_desc}</p>
-      </div>
-      <div class='ticket-timeline'>
-        {steps_html}
-      </div>
-    </div>"""
+        # Gagal validasi: render ulang langsung dengan pesan error, tanpa redirect + GET kedua.
+        # Post-Redirect-Get hanya dipakai saat berhasil.
+        if not title or not slug:
+            flash("Judul dan slug wajib diisi.", "danger")
+            return _admin_forms_page()
 
+        # Keunikan slug dijaga constraint UNIQUE; langsung INSERT tanpa SELECT dulu.
+        # Core insert: satu statement, tanpa objek ORM / refresh PK yang tidak dipakai.
+        try:
+            db.session.execute(
+                insert(ProgramForm).values(
+                    title=title,
+                    slug=slug,
+                    icon=icon or "📝",
+                    description=description,
+                    url=url_form,
+                    is_active=True,
+                    created_by=admin.id,
+                )
+            )
+            # Form + log dalam satu transaksi: satu commit (satu fsync WAL)
+            log_action(admin.id, "admin_add_form", slug, commit=False)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash("Slug sudah digunakan, pilih slug lain.", "danger")
+            return _admin_forms_page()
+        _admin_forms_body.cache_clear()
+        flash("Form berhasil ditambahkan.", "success")
+        return redirect(url_for("admin_forms"))
 
-    # Tabel riwayat semua tiket
-    
-    # Tabel riwayat semua tiket + hitung pesan belum dibaca
-    ticket_ids = [t.id for t in tickets_all]
-    unread_map = {}
-    if ticket_ids:
-        for msg in TicketMessage.query.filter(TicketMessage.ticket_id.in_(ticket_ids)).all():
-            if not msg.is_read_user and msg.sender_id != user.id:
-                unread_map[msg.ticket_id] = unread_map.get(msg.ticket_id, 0) + 1
+    return _admin_forms_page()
 
-    
-    history_rows = ""
-    for t in tickets_all:
-        ticket_no = format_ticket_number(t)
-        created = t.created_at.astimezone(WIB).strftime("%d %b %Y, %H:%M") if t.created_at else "-"
-        updated = t.updated_at.astimezone(WIB).strftime("%d %b %Y, %H:%M") if t.updated_at else "-"
-        completed = t.completed_at.astimezone(WIB).strftime("%d %b %Y, %H:%M") if getattr(t, "completed_at", None) else "-"
-        status_label = t.status.replace("_", " ").title()
-        unread = unread_map.get(t.id, 0)
-        unread_html = f"<span class='badge-unread'>{unread}</span>" if unread else ""
-        category = t.category or "-"
-        short_desc = (t.description or "").strip().replace("\n", " ")
-        if len(short_desc) > 160:
-            short_desc = short_desc[:160] + "..."
 
-        history_rows += f"""<tr>
-          <td>{created}</td>
-          <td>{ticket_no}</td>
-          <td>{category}</td>
-          <td><span class='badge badge-status-{t.status}'>{status_label}</span></td>
-          <td>{short_desc}</td>
-          <td>{completed}</td>
-          <td>{updated}</td>
-          <td><button class='btn btn-chat btn-sm' type='button' onclick="openTicketChat({t.id}, '{ticket_no}')">Chat{(' ' + unread_html) if unread_html else ''}</button></td>
-        </tr>"""
-    body = f"""
-    <div class=\"surface\">
-      <div class=\"page-header\">
+def _admin_forms_page():
+    # Kunci cache murah: form baru mengubah max(created_at)/count(*), cache lama otomatis basi
+    max_created, total = db.session.query(
+        func.max(ProgramForm.created_at), func.count(ProgramForm.id)
+    ).one()
+    cursor = _parse_keyset_cursor(request.args.get("cursor", ""))
+    body = _admin_forms_body(cursor, max_created, total)
+    return render_page(body, title="Admin - Forms", active_nav="admin_forms")
+
+
+# ============================================================
+# ADMIN - POSTINGAN KABAR & DOKUM
+
+TICKET_STEPS = ("open", "in_progress", "resolved", "closed")
+TICKET_STEP_INDEX = {s: i for i, s in enumerate(TICKET_STEPS)}
+TICKET_STATUS_LABEL = {s: s.replace("_", " ").title() for s in TICKET_STEPS}
+
+# Kolom yang dipakai list tiket; description/admin_note (TEXT panjang) tidak ikut dimuat
+TICKET_LIST_COLUMNS = (
+    Ticket.id,
+    Ticket.user_id,
+    Ticket.assigned_admin_id,
+    Ticket.title,
+    Ticket.status,
+    Ticket.category,
+    Ticket.created_at,
+    Ticket.updated_at,
+    Ticket.completed_at,
+)
+# Cuplikan deskripsi dipotong di SQL; 1 karakter ekstra untuk menentukan perlu "..." atau tidak
+TICKET_DESC_SNIPPET_LEN = 200
+TICKET_DESC_SNIPPET = func.substr(
+    func.btrim(Ticket.description, " \t\r\n"), 1, TICKET_DESC_SNIPPET_LEN + 1
+).label("short_description")
+
+
+def _short_desc(snippet: str | None, limit: int) -> str:
+    text_ = (snippet or "").replace("\n", " ")
+    if len(text_) > limit:
+        text_ = text_[:limit] + "..."
+    return text_
+
+
+TICKET_PAGE_SIZE = 50
+
+
+def _ticket_page(q, cursor):
+    """Satu halaman keyset dari query tiket berurutan (created_at, id) desc.
+    Return (rows, next_cursor); next_cursor None jika sudah halaman terakhir.
+    """
+    if cursor:
+        q = q.filter(tuple_(Ticket.created_at, Ticket.id) < cursor)
+    rows = q.limit(TICKET_PAGE_SIZE + 1).all()
+    next_cursor = None
+    if len(rows) > TICKET_PAGE_SIZE:
+        rows = rows[:TICKET_PAGE_SIZE]
+        last = rows[-1][0]
+        if last.created_at:
+            next_cursor = f"{last.created_at.isoformat()}_{last.id}"
+    return rows, next_cursor
+
+
+@lru_cache(maxsize=None)
+def _ticket_timeline_html(current_index: int) -> Markup:
+    """HTML timeline status tiket; hanya ada 4 kemungkinan, jadi cukup dirender sekali per index."""
+    parts = []
+    for idx, s in enumerate(TICKET_STEPS):
+        label = TICKET_STATUS_LABEL[s]
+        if idx < current_index:
+            cls = "done"
+        elif idx == current_index:
+            cls = "current"
+        else:
+            cls = "future"
+        parts.append(f"<div class='ticket-step ticket-step-{cls}'><div class='ticket-step-dot'></div><div class='ticket-step-label'>{label}</div></div>")
+    return Markup("".join(parts))
+
+
+TICKETS_HTML = """
+    <div class="surface">
+      <div class="page-header">
         <div>
-          <h1 class=\"page-title\">Kendala Sistem Ticketing</h1>
-          <p class=\"page-subtitle\">Laporkan kendala sistem ticketing dan pantau progres penanganannya.</p>
+          <h1 class="page-title">Kendala Sistem Ticketing</h1>
+          <p class="page-subtitle">Laporkan kendala sistem ticketing dan pantau progres penanganannya.</p>
         </div>
         <div>
-          <a href=\"{url_for('ticket_new')}\" class=\"btn btn-primary\">Buat Laporan</a>
+          <a href="{{ url_for('ticket_new') }}" class="btn btn-primary">Buat Laporan</a>
         </div>
       </div>
 
-      <div class=\"form-card\">
-        <h2 class=\"page-title\" style=\"font-size:1rem;\">Tiket Berjalan</h2>
-        <p class=\"page-subtitle\">Hanya menampilkan tiket yang masih dalam status Open atau In Progress.</p>
-        <div class=\"ticket-ongoing-grid\" style=\"margin-top:0.8rem;\">
-          {ongoing_cards or "<p style='font-size:0.8rem;color:var(--text-muted);'>Saat ini tidak ada tiket berjalan.</p>"}
+      <div class="form-card">
+        <h2 class="page-title" style="font-size:1rem;">Tiket Berjalan</h2>
+        <p class="page-subtitle">Hanya menampilkan tiket yang masih dalam status Open atau In Progress.</p>
+        <div class="ticket-ongoing-grid" style="margin-top:0.8rem;">
+          {%- for t in ongoing %}
+          <div class='ticket-card'>
+            <div class='ticket-card-header'>
+              <div>
+                <div class='ticket-title'>#{{ t.ticket_no }} — {{ t.title }}</div>
+                <div class='ticket-meta'>Dibuat: {{ t.created }}</div>
+              </div>
+              <div class='ticket-status-pill status-{{ t.status }}'>{{ t.status_label }}</div>
+            </div>
+            <div class='ticket-body'>
+              <p>{{ t.short_desc }}</p>
+            </div>
+            <div class='ticket-timeline'>
+              {{ t.steps_html }}
+            </div>
+          </div>
+          {%- else %}
+          <p style='font-size:0.8rem;color:var(--text-muted);'>Saat ini tidak ada tiket berjalan.</p>
+          {%- endfor %}
         </div>
       </div>
 
-      <div class=\"table-surface\" style=\"margin-top:1.4rem;\">
-        <div class=\"table-scroll\">
-          
+      <div class="table-surface" style="margin-top:1.4rem;">
+        <div class="table-scroll">
           <table class="tickets-table user-tickets-table">
             <thead>
               <tr>
@@ -3538,18 +3914,149 @@ def tickets():
                 <th class="col-updated">Update Terakhir</th>
                 <th class="col-actions">Chat</th>
               </tr>
-</thead>
+            </thead>
             <tbody>
-              {history_rows or "<tr><td colspan='7' style='text-align:center;font-size:0.8rem;color:var(--text-muted);'>Belum ada tiket yang tercatat.</td></tr>"}
+              {%- for t in history %}
+              <tr>
+                <td>{{ t.created }}</td>
+                <td>{{ t.ticket_no }}</td>
+                <td>{{ t.category }}</td>
+                <td><span class='badge badge-status-{{ t.status }}'>{{ t.status_label }}</span></td>
+                <td>{{ t.short_desc }}</td>
+                <td>{{ t.completed }}</td>
+                <td>{{ t.updated }}</td>
+                <td><button class='btn btn-chat btn-sm' type='button' onclick='openTicketChat({{ t.id }}, {{ t.ticket_no|tojson }})'>Chat{% if t.unread %} <span class='badge-unread'>{{ t.unread }}</span>{% endif %}</button></td>
+              </tr>
+              {%- else %}
+              <tr><td colspan='7' style='text-align:center;font-size:0.8rem;color:var(--text-muted);'>Belum ada tiket yang tercatat.</td></tr>
+              {%- endfor %}
             </tbody>
           </table>
         </div>
       </div>
+      {%- if next_cursor %}
+      <div style="margin-top:0.8rem;text-align:center;">
+        <a href="{{ url_for('tickets', cursor=next_cursor) }}" class="btn btn-ghost btn-sm">Muat lebih banyak</a>
+      </div>
+      {%- endif %}
     </div>
-    """
+"""
+TICKETS_TMPL = _compile_template(TICKETS_HTML)
+
+
+@app.route("/tickets")
+@login_required
+def tickets():
+    user = current_user()
+    if not user:
+        return redirect(url_for("login"))
+
+    user_tickets = (
+        Ticket.query.options(load_only(*TICKET_LIST_COLUMNS))
+        .add_columns(TICKET_DESC_SNIPPET)
+        .filter_by(user_id=user.id)
+        .order_by(Ticket.created_at.desc(), Ticket.id.desc())
+    )
+
+    # Tiket yang masih berjalan (open & in_progress) selalu tampil lengkap
+    ongoing_tickets = user_tickets.filter(Ticket.status.in_(("open", "in_progress"))).all()
+    # Riwayat dipaginasi keyset per TICKET_PAGE_SIZE
+    tickets_all, next_cursor = _ticket_page(
+        user_tickets, _parse_keyset_cursor(request.args.get("cursor", ""))
+    )
+
+    ongoing = []
+    for t, desc in ongoing_tickets:
+        # timeline
+        current_index = TICKET_STEP_INDEX.get(t.status, 0)
+        ongoing.append({
+            "ticket_no": format_ticket_number(t),
+            "title": t.title,
+            "created": _fmt_wib(t.created_at) if t.created_at else "-",
+            "status": t.status,
+            "status_label": TICKET_STATUS_LABEL.get(t.status, t.status),
+            "short_desc": _short_desc(desc, TICKET_DESC_SNIPPET_LEN),
+            "steps_html": _ticket_timeline_html(current_index),
+        })
+
+    # Tabel riwayat semua tiket + hitung pesan belum dibaca
+    ticket_ids = [t.id for t, _ in tickets_all]
+    unread_map = {}
+    if ticket_ids:
+        unread_map = dict(
+            db.session.query(TicketMessage.ticket_id, func.count())
+            .filter(
+                TicketMessage.ticket_id.in_(ticket_ids),
+                TicketMessage.is_read_user.isnot(True),
+                TicketMessage.sender_id != user.id,
+            )
+            .group_by(TicketMessage.ticket_id)
+            .all()
+        )
+
+    history = []
+    for t, desc in tickets_all:
+        history.append({
+            "id": t.id,
+            "ticket_no": format_ticket_number(t),
+            "created": _fmt_wib(t.created_at) if t.created_at else "-",
+            "updated": _fmt_wib(t.updated_at) if t.updated_at else "-",
+            "completed": _fmt_wib(t.completed_at) if t.completed_at else "-",
+            "status": t.status,
+            "status_label": TICKET_STATUS_LABEL.get(t.status, t.status),
+            "unread": unread_map.get(t.id, 0),
+            "category": t.category or "-",
+            "short_desc": _short_desc(desc, 160),
+        })
+
+    body = render_body(TICKETS_TMPL, ongoing=ongoing, history=history, next_cursor=next_cursor)
     return render_page(body, title="Kendala Sistem", active_nav="tickets")
 
 
+TICKET_NEW_HTML = """
+    <div class="surface">
+      <div class="page-header">
+        <div>
+          <h1 class="page-title">Buat Laporan Kendala</h1>
+          <p class="page-subtitle">Ceritakan kendala yang Anda alami pada sistem ticketing.</p>
+        </div>
+        <div>
+          <a href="{{ url_for('tickets') }}" class="btn btn-ghost">Kembali ke Daftar Laporan</a>
+        </div>
+      </div>
+
+      <div class="form-card">
+        <form method="post" enctype="multipart/form-data">
+          <div class="form-group">
+            <label for="category" class="form-label">Kategori Kendala</label>
+            <select id="category" name="category" class="form-select">
+              <option value="">Pilih Kategori (Wajib)</option>
+              <option value="Kehadiran Pembinaan">Kehadiran Pembinaan</option>
+              <option value="Kehadiran mentoring">Kehadiran mentoring</option>
+              <option value="Pre-Post Test">Pre-Post Test</option>
+              <option value="Ganti Nomor HP">Ganti Nomor HP</option>
+              <option value="Tugas">Tugas</option>
+            </select>
+          </div>
+          <div class="form-group">
+            <label for="description" class="form-label">Deskripsi Kendala</label>
+            <textarea id="description" name="description" rows="5" class="form-input" placeholder="Jelaskan masalah yang terjadi secara singkat dan jelas..." required></textarea>
+          </div>
+          <div class="form-group">
+            <label for="attachment" class="form-label">Lampiran Gambar (maks. 300 KB)</label>
+            <input type="file" id="attachment" name="attachment" class="form-input" accept="image/*" />
+            <p style="font-size:0.75rem;color:var(--text-muted);margin-top:0.25rem;">Opsional. Unggah screenshot pendukung jika perlu.</p>
+          </div>
+          <div class="form-actions" style="margin-top:1rem;display:flex;justify-content:flex-end;gap:0.5rem;">
+            <a href="{{ url_for('tickets') }}" class="btn btn-ghost">Batal</a>
+            <button class="btn btn-primary" type="submit">Kirim Laporan</button>
+          </div>
+        </form>
+      </div>
+    </div>
+"""
+TICKET_NEW_TMPL = _compile_template(TICKET_NEW_HTML)
+
 
 @app.route("/tickets/new", methods=["GET", "POST"])
 @login_required
@@ -3580,23 +4087,25 @@ def ticket_new():
             )
             db.session.add(ticket)
             db.session.commit()
+            _admin_ticket_kpis.cache_clear()
 
             # handle lampiran (opsional), hanya gambar dan maks 300 KB
             if attachment and attachment.filename:
                 filename = secure_filename(attachment.filename)
                 ext = os.path.splitext(filename)[1].lower()
                 allowed_ext = {".png", ".jpg", ".jpeg"}
-                data = attachment.read()
                 if ext not in allowed_ext:
                     flash("File lampiran harus berupa gambar (PNG/JPG).", "danger")
-                elif len(data) > 300 * 1024:
+                elif read_upload(attachment, 300 * 1024, keep=False) is None:
                     flash("Ukuran file lampiran maksimal 300 KB.", "danger")
                 else:
                     upload_dir = os.path.join(app.static_folder, "uploads", "tickets", str(ticket.id))
                     os.makedirs(upload_dir, exist_ok=True)
                     save_path = os.path.join(upload_dir, filename)
+                    # Salin stream langsung ke disk per 64 KB, tanpa buffer seluruh file
+                    attachment.stream.seek(0)
                     with open(save_path, "wb") as f:
-                        f.write(data)
+                        shutil.copyfileobj(attachment.stream, f, length=UPLOAD_CHUNK_SIZE)
                     rel_path = os.path.relpath(save_path, app.static_folder).replace(os.path.sep, "/")
                     ticket.attachment_path = rel_path
                     db.session.commit()
@@ -3605,50 +4114,226 @@ def ticket_new():
             flash("Laporan kendala berhasil dikirim.", "success")
             return redirect(url_for("tickets"))
 
-    body = f"""
-    <div class=\"surface\">
-      <div class=\"page-header\">
+    body = render_body(TICKET_NEW_TMPL)
+    return render_page(body, title="Laporan Kendala Baru", active_nav="tickets")
+
+
+
+def _admin_ticket_query(args):
+    """Query tiket admin dengan filter status/user/admin/judul/tahun dari query string.
+    Semua filter dijalankan di SQL (ILIKE + rentang created_at), bukan di Python.
+    """
+    status_filter = args.get("status", "all").strip().lower()
+    user_filter = (args.get("user") or "").strip()
+    admin_filter = (args.get("admin") or "").strip()
+    title_filter = (args.get("title") or "").strip()
+    year_filter = (args.get("year") or "").strip()
+
+    # Eager-load user & admin: 2 query tambahan total, bukan 2 per tiket
+    q = Ticket.query.options(selectinload(Ticket.user), selectinload(Ticket.assigned_admin))
+
+    if status_filter != "all":
+        q = q.filter_by(status=status_filter)
+    if user_filter:
+        ticket_user = aliased(User)
+        q = q.join(ticket_user, Ticket.user_id == ticket_user.id).filter(
+            ticket_user.full_name.icontains(user_filter, autoescape=True)
+        )
+    if admin_filter:
+        ticket_admin = aliased(User)
+        q = q.join(ticket_admin, Ticket.assigned_admin_id == ticket_admin.id).filter(
+            ticket_admin.full_name.icontains(admin_filter, autoescape=True)
+        )
+    if title_filter:
+        q = q.filter(Ticket.title.icontains(title_filter, autoescape=True))
+    if year_filter:
+        # Rentang created_at (sargable) untuk tahun WIB, bukan extract(year) per baris
+        bounds = _wib_year_bounds(year_filter)
+        if bounds is None:
+            q = q.filter(false())
+        else:
+            q = q.filter(Ticket.created_at >= bounds[0], Ticket.created_at < bounds[1])
+
+    return q.order_by(Ticket.created_at.desc(), Ticket.id.desc())
+
+
+ADMIN_TICKET_KPI_TTL = 15
+
+
+@lru_cache(maxsize=32)
+def _admin_ticket_kpis(admin_id: int, ttl_bucket: int) -> dict:
+    """KPI tiket admin: satu GROUP BY status + satu SELECT dengan aggregate ber-FILTER.
+    `ttl_bucket` berganti tiap ADMIN_TICKET_KPI_TTL detik; cache dikosongkan saat tiket dibuat/diubah.
+    """
+    status_counts = dict(
+        db.session.query(Ticket.status, func.count()).group_by(Ticket.status).all()
+    )
+    unassigned_count, my_count = db.session.query(
+        func.count().filter(Ticket.assigned_admin_id.is_(None)),
+        func.count().filter(Ticket.assigned_admin_id == admin_id),
+    ).one()
+    return {
+        "total": sum(status_counts.values()),
+        "open": status_counts.get("open", 0),
+        "in_progress": status_counts.get("in_progress", 0),
+        "resolved": status_counts.get("resolved", 0),
+        "closed": status_counts.get("closed", 0),
+        "unassigned": unassigned_count,
+        "mine": my_count,
+    }
+
+
+ADMIN_TICKET_STATUS_OPTIONS = (
+    ("all", "Semua"),
+    ("open", "Open"),
+    ("in_progress", "In Progress"),
+    ("resolved", "Resolved"),
+    ("closed", "Closed"),
+)
+
+ADMIN_TICKETS_HTML = """
+    <div class="surface">
+      <div class="page-header">
         <div>
-          <h1 class=\"page-title\">Buat Laporan Kendala</h1>
-          <p class=\"page-subtitle\">Ceritakan kendala yang Anda alami pada sistem ticketing.</p>
+          <h1 class="page-title">Admin — Kendala Sistem Ticketing</h1>
+          <p class="page-subtitle">Manage and monitor student system issue reports.</p>
         </div>
-        <div>
-          <a href=\"{url_for('tickets')}\" class=\"btn btn-ghost\">Kembali ke Daftar Laporan</a>
+      </div>
+
+      <div class="cards-grid" style="margin-bottom:1rem;">
+        <div class="card">
+          <div class="card-title">Total Tickets</div>
+          <div style="font-size:1.4rem;font-weight:700;margin-top:0.3rem;">{{ counts.total }}</div>
+        </div>
+        <div class="card">
+          <div class="card-title">Open</div>
+          <div style="font-size:1.4rem;font-weight:700;margin-top:0.3rem;">{{ counts.open }}</div>
+        </div>
+        <div class="card">
+          <div class="card-title">In Progress</div>
+          <div style="font-size:1.4rem;font-weight:700;margin-top:0.3rem;">{{ counts.in_progress }}</div>
+        </div>
+        <div class="card">
+          <div class="card-title">Resolved</div>
+          <div style="font-size:1.4rem;font-weight:700;margin-top:0.3rem;">{{ counts.resolved }}</div>
+        </div>
+        <div class="card">
+          <div class="card-title">Closed</div>
+          <div style="font-size:1.4rem;font-weight:700;margin-top:0.3rem;">{{ counts.closed }}</div>
+        </div>
+        <div class="card">
+          <div class="card-title">Unassigned</div>
+          <div style="font-size:1.4rem;font-weight:700;margin-top:0.3rem;">{{ counts.unassigned }}</div>
+        </div>
+        <div class="card">
+          <div class="card-title">Assigned to Me</div>
+          <div style="font-size:1.4rem;font-weight:700;margin-top:0.3rem;">{{ counts.mine }}</div>
         </div>
       </div>
 
-      <div class=\"form-card\">
-        <form method=\"post\" enctype=\"multipart/form-data\">
-          <div class=\"form-group\">
-            <label for=\"category\" class=\"form-label\">Kategori Kendala</label>
-            <select id=\"category\" name=\"category\" class=\"form-select\">
-              <option value=\"\">Pilih Kategori (Wajib)</option>
-              <option value=\"Kehadiran Pembinaan\">Kehadiran Pembinaan</option>
-              <option value=\"Kehadiran mentoring\">Kehadiran mentoring</option>
-              <option value=\"Pre-Post Test\">Pre-Post Test</option>
-              <option value=\"Ganti Nomor HP\">Ganti Nomor HP</option>
-              <option value=\"Tugas\">Tugas</option>
-            </select>
+      <div class="form-card">
+        <form id="ticket-filter-form" method="get" style="display:flex;flex-wrap:wrap;gap:0.6rem;align-items:flex-end;">
+          <div class="form-group" style="min-width:120px;">
+            <label class="form-label">Tahun</label>
+            <input name="year" class="form-input" placeholder="contoh: 2025" value="{{ year_filter }}" />
           </div>
-          <div class=\"form-group\">
-            <label for=\"description\" class=\"form-label\">Deskripsi Kendala</label>
-            <textarea id=\"description\" name=\"description\" rows=\"5\" class=\"form-input\" placeholder=\"Jelaskan masalah yang terjadi secara singkat dan jelas...\" required></textarea>
+          <div class="form-group" style="min-width:120px;">
+            <label class="form-label">User</label>
+            <input name="user" class="form-input" placeholder="Nama user" value="{{ user_q }}" />
           </div>
-          <div class=\"form-group\">
-            <label for=\"attachment\" class=\"form-label\">Lampiran Gambar (maks. 300 KB)</label>
-            <input type=\"file\" id=\"attachment\" name=\"attachment\" class=\"form-input\" accept=\"image/*\" />
-            <p style=\"font-size:0.75rem;color:var(--text-muted);margin-top:0.25rem;\">Opsional. Unggah screenshot pendukung jika perlu.</p>
+          <div class="form-group" style="min-width:120px;">
+            <label class="form-label">Admin</label>
+            <input name="admin" class="form-input" placeholder="Nama admin" value="{{ admin_q }}" />
           </div>
-          <div class=\"form-actions\" style=\"margin-top:1rem;display:flex;justify-content:flex-end;gap:0.5rem;\">
-            <a href=\"{url_for('tickets')}\" class=\"btn btn-ghost\">Batal</a>
-            <button class=\"btn btn-primary\" type=\"submit\">Kirim Laporan</button>
+          <div class="form-group" style="min-width:160px;">
+            <label class="form-label">Title</label>
+            <input name="title" class="form-input" placeholder="Judul mengandung..." value="{{ title_q }}" />
+          </div>
+          <div class="form-group">
+            <label class="form-label">Status</label>
+            <select name="status" class="form-select">
+              {%- for key, label in status_options %}
+              <option value="{{ key }}" {{ 'selected' if status_filter == key else '' }}>{{ label }}</option>
+              {%- endfor %}
+            </select>
           </div>
         </form>
+
+        <div class="filter-row">
+          <div class="filter-row-left">
+            <span style="color:var(--text-muted);">Quick status filter:</span>
+            {%- for key, label in status_options %}
+            <a href='{{ base_url if key == "all" else base_url ~ "?status=" ~ key }}' class='filter-pill {{ "filter-pill-active" if status_filter == key else "" }}'>{{ label }}</a>
+            {%- endfor %}
+          </div>
+          <div class="filter-row-right">
+            <button class="btn btn-primary btn-sm" type="submit" form="ticket-filter-form">Apply Filter</button>
+            <a href="{{ base_url }}" class="btn btn-ghost btn-sm">Reset Filter</a>
+            <a href="{{ export_url }}" class="btn btn-ghost btn-sm">Download Excel</a>
+          </div>
+        </div>
       </div>
-    </div>
-    """
-    return render_page(body, title="Laporan Kendala Baru", active_nav="tickets")
 
+      <div class="table-surface">
+        <div class="table-scroll">
+          <table class="tickets-table admin-tickets-table">
+            <thead>
+              <tr>
+                <th class="col-created">Created</th>
+                <th class="col-ticket">No. Ticket</th>
+                <th class="col-category">Kategori</th>
+                <th class="col-user">User</th>
+                <th class="col-admin">Admin</th>
+                <th class="col-desc">Deskripsi</th>
+                <th class="col-status">Status</th>
+                <th class="col-completed">Completed</th>
+                <th class="col-actions">Actions</th>
+              </tr>
+            </thead>
+            <tbody>
+              {%- for t in tickets %}
+              <tr>
+                <td>{{ t.created }}</td>
+                <td>{{ t.ticket_no }}</td>
+                <td>{{ t.category }}</td>
+                <td>{{ t.user_name }}</td>
+                <td>{{ t.assigned_name }}</td>
+                <td>{{ t.short_desc }}</td>
+                <td><span class='badge badge-status-{{ t.status }}'>{{ t.status_label }}</span></td>
+                <td>{{ t.completed }}</td>
+                <td>
+                  <form method='post' style='display:flex;flex-direction:column;gap:0.35rem;min-width:220px;'>
+                    <input type='hidden' name='ticket_id' value='{{ t.id }}' />
+                    <div style='display:flex;flex-wrap:wrap;gap:0.35rem;align-items:center;'>
+                      <button class='btn btn-chat btn-sm' type='button' onclick='openTicketChat({{ t.id }}, {{ t.ticket_no|tojson }})'>
+                        Chat{% if t.unread %} <span class='badge-unread'>{{ t.unread }}</span>{% endif %}
+                      </button>
+                      <button class='btn btn-sm btn-status-accept' type='submit' name='action' value='accept' {{ 'disabled' if t.status != 'open' }}>Accepted</button>
+                      <button class='btn btn-sm btn-status-complete' type='submit' name='action' value='complete' {{ 'disabled' if t.status != 'in_progress' }}>Completed</button>
+                      <button class='btn btn-sm btn-status-close' type='submit' name='action' value='close' {{ 'disabled' if t.status != 'resolved' }}>Closed</button>
+                      <button class='btn btn-primary btn-sm' type='button' onclick="openTicketNotes({{ t.id }})">
+                        Notes
+                      </button>
+                    </div>
+                    <div style='display:flex;gap:0.25rem;'>
+                      <input type='text' name='admin_note' placeholder='Catatan admin / progres ...' class='form-input' style='flex:1;min-width:130px;font-size:0.78rem;' required />
+                    </div>
+                  </form>
+                </td>
+              </tr>
+              {%- endfor %}
+            </tbody>
+          </table>
+        </div>
+      </div>
+      {%- if next_url %}
+      <div style="margin-top:0.8rem;text-align:center;">
+        <a href="{{ next_url }}" class="btn btn-ghost btn-sm">Muat lebih banyak</a>
+      </div>
+      {%- endif %}
+    </div>
+"""
+ADMIN_TICKETS_TMPL = _compile_template(ADMIN_TICKETS_HTML)
 
 
 @app.route("/admin/tickets", methods=["GET", "POST"])
@@ -3667,7 +4352,10 @@ def admin_tickets():
             flash("Catatan admin wajib diisi sebelum melakukan aksi pada tiket.", "danger")
             return redirect(url_for("admin_tickets"))
 
-        ticket = Ticket.query.get(ticket_id)
+        try:
+            ticket = db.session.get(Ticket, int(ticket_id or 0))
+        except ValueError:
+            ticket = None
         if not ticket:
             flash("Ticket not found.", "danger")
             return redirect(url_for("admin_tickets"))
@@ -3684,20 +4372,20 @@ def admin_tickets():
         if action == "accept":
             if ticket.status == "open":
                 ticket.status = "in_progress"
-            log_action(admin.id, "ticket_update_status", f"{ticket.id}:in_progress")
+            log_action(admin.id, "ticket_update_status", f"{ticket.id}:in_progress", commit=False)
         elif action == "complete":
             if ticket.status in ("in_progress", "resolved"):
                 # set completed_at saat pertama kali selesai
                 if ticket.status != "resolved" and getattr(ticket, "completed_at", None) is None:
                     ticket.completed_at = datetime.now(WIB)
                 ticket.status = "resolved"
-            log_action(admin.id, "ticket_update_status", f"{ticket.id}:resolved")
+            log_action(admin.id, "ticket_update_status", f"{ticket.id}:resolved", commit=False)
         elif action == "close":
             if ticket.status != "closed":
                 ticket.status = "closed"
-            log_action(admin.id, "ticket_update_status", f"{ticket.id}:closed")
+            log_action(admin.id, "ticket_update_status", f"{ticket.id}:closed", commit=False)
 
-        # Append admin note as running log
+        # Append admin note as running log; perubahan tiket + log di-commit sekali di bawah
         if admin_note:
             timestamp = datetime.now(WIB).strftime("%d %b %Y, %H:%M WIB")
             prefix = f"[{timestamp}] "
@@ -3708,237 +4396,83 @@ def admin_tickets():
                 ticket.admin_note = prefix + admin_note
 
         db.session.commit()
+        _admin_ticket_kpis.cache_clear()
         flash("Ticket updated successfully.", "success")
         return redirect(url_for("admin_tickets"))
 
     # === GET: list & filters ===
     status_filter = request.args.get("status", "all").strip().lower()
-    user_filter = (request.args.get("user") or "").strip().lower()
-    admin_filter = (request.args.get("admin") or "").strip().lower()
-    title_filter = (request.args.get("title") or "").strip().lower()
     year_filter = (request.args.get("year") or "").strip()
 
-    q = Ticket.query
-
-    if status_filter != "all":
-        q = q.filter_by(status=status_filter)
-
-    tickets = q.order_by(Ticket.created_at.desc()).all()
-
-    # In-memory filters for name/title/year to keep query simple
-    filtered_tickets = []
-    for t in tickets:
-        u_name = (t.user.full_name if t.user and t.user.full_name else "").lower()
-        a_name = (t.assigned_admin.full_name if getattr(t, "assigned_admin", None) and t.assigned_admin.full_name else "").lower()
-        title = (t.title or "").lower()
-        year_str = t.created_at.astimezone(WIB).strftime("%Y") if t.created_at else ""
-
-        if user_filter and user_filter not in u_name:
-            continue
-        if admin_filter and admin_filter not in a_name:
-            continue
-        if title_filter and title_filter not in title:
-            continue
-        if year_filter and year_filter != year_str:
-            continue
-        filtered_tickets.append(t)
-
-    tickets = filtered_tickets
-
-    # KPI summary
-    total_tickets = Ticket.query.count()
-    open_count = Ticket.query.filter_by(status="open").count()
-    in_progress_count = Ticket.query.filter_by(status="in_progress").count()
-    resolved_count = Ticket.query.filter_by(status="resolved").count()
-    closed_count = Ticket.query.filter_by(status="closed").count()
-    unassigned_count = Ticket.query.filter(Ticket.assigned_admin_id.is_(None)).count()
-    my_count = Ticket.query.filter_by(assigned_admin_id=admin.id).count()
+    tickets, next_cursor = _ticket_page(
+        _admin_ticket_query(request.args)
+        .options(load_only(*TICKET_LIST_COLUMNS))
+        .add_columns(TICKET_DESC_SNIPPET),
+        _parse_keyset_cursor(request.args.get("cursor", "")),
+    )
 
+    counts = _admin_ticket_kpis(admin.id, int(time.monotonic() // ADMIN_TICKET_KPI_TTL))
 
     # Hitung jumlah pesan belum dibaca per ticket untuk admin
-    ticket_ids = [t.id for t in tickets]
+    ticket_ids = [t.id for t, _ in tickets]
     unread_map = {}
     if ticket_ids:
-        for msg in TicketMessage.query.filter(TicketMessage.ticket_id.in_(ticket_ids)).all():
-            if admin.role == "admin" and not msg.is_read_admin and msg.sender_id != admin.id:
-                unread_map[msg.ticket_id] = unread_map.get(msg.ticket_id, 0) + 1
-
-    def status_label(s: str) -> str:
-        return s.replace("_", " ").title()
-
-
-    
-    rows = ""
-    for t in tickets:
-        created = t.created_at.astimezone(WIB).strftime("%d %b %Y, %H:%M") if t.created_at else "-"
-        completed = t.completed_at.astimezone(WIB).strftime("%d %b %Y, %H:%M") if getattr(t, "completed_at", None) else "-"
-        assigned_name = t.assigned_admin.full_name if getattr(t, "assigned_admin", None) else "-"
-        user_name = t.user.full_name if t.user else "-"
-        ticket_no = format_ticket_number(t)
-        unread = unread_map.get(t.id, 0)
-        unread_html = f"<span class='badge-unread'>{unread}</span>" if unread else ""
-        category = t.category or "-"
-        short_desc = (t.description or "").strip().replace("\n", " ")
-        if len(short_desc) > 160:
-            short_desc = short_desc[:160] + "..."
-
-        accept_disabled = "disabled" if t.status != "open" else ""
-        complete_disabled = "disabled" if t.status != "in_progress" else ""
-        close_disabled = "disabled" if t.status != "resolved" else ""
-
-        rows += f"""
-        <tr>
-          <td>{created}</td>
-          <td>{ticket_no}</td>
-          <td>{category}</td>
-          <td>{user_name}</td>
-          <td>{assigned_name}</td>
-          <td>{short_desc}</td>
-          <td><span class='badge badge-status-{t.status}'>{status_label(t.status)}</span></td>
-          <td>{completed}</td>
-          <td>
-            <form method='post' style='display:flex;flex-direction:column;gap:0.35rem;min-width:220px;'>
-              <input type='hidden' name='ticket_id' value='{t.id}' />
-              <div style='display:flex;flex-wrap:wrap;gap:0.35rem;align-items:center;'>
-                <button class='btn btn-chat btn-sm' type='button' onclick="openTicketChat({t.id}, '{ticket_no}')">
-                  Chat{(' ' + unread_html) if unread_html else ''}
-                </button>
-                <button class='btn btn-sm btn-status-accept' type='submit' name='action' value='accept' {accept_disabled}>Accepted</button>
-                <button class='btn btn-sm btn-status-complete' type='submit' name='action' value='complete' {complete_disabled}>Completed</button>
-                <button class='btn btn-sm btn-status-close' type='submit' name='action' value='close' {close_disabled}>Closed</button>
-                <button class='btn btn-primary btn-sm' type='button' onclick="openTicketNotes({t.id})">
-                  Notes
-                </button>
-              </div>
-              <div style='display:flex;gap:0.25rem;'>
-                <input type='text' name='admin_note' placeholder='Catatan admin / progres ...' class='form-input' style='flex:1;min-width:130px;font-size:0.78rem;' required />
-              </div>
-            </form>
-          </td>
-        </tr>
-        """
-# Status filter pills
-    base_url = url_for("admin_tickets")
-    def status_link(label_key, label_text):
-        active = "filter-pill-active" if status_filter == label_key else ""
-        href = f"{base_url}?status={label_key}" if label_key != "all" else base_url
-        return f"<a href='{href}' class='filter-pill {active}'>{label_text}</a>"
-
-    filters_html = " ".join([
-        status_link("all", "Semua"),
-        status_link("open", "Open"),
-        status_link("in_progress", "In Progress"),
-        status_link("resolved", "Resolved"),
-        status_link("closed", "Closed"),
-    ])
-
-    body = f"""
-    <div class=\"surface\">
-      <div class=\"page-header\">
-        <div>
-          <h1 class=\"page-title\">Admin — Kendala Sistem Ticketing</h1>
-          <p class=\"page-subtitle\">Manage and monitor student system issue reports.</p>
-        </div>
-      </div>
-
-      <div class=\"cards-grid\" style=\"margin-bottom:1rem;\">
-        <div class=\"card\">
-          <div class=\"card-title\">Total Tickets</div>
-          <div style=\"font-size:1.4rem;font-weight:700;margin-top:0.3rem;\">{total_tickets}</div>
-        </div>
-        <div class=\"card\">
-          <div class=\"card-title\">Open</div>
-          <div style=\"font-size:1.4rem;font-weight:700;margin-top:0.3rem;\">{open_count}</div>
-        </div>
-        <div class=\"card\">
-          <div class=\"card-title\">In Progress</div>
-          <div style=\"font-size:1.4rem;font-weight:700;margin-top:0.3rem;\">{in_progress_count}</div>
-        </div>
-        <div class=\"card\">
-          <div class=\"card-title\">Resolved</div>
-          <div style=\"font-size:1.4rem;font-weight:700;margin-top:0.3rem;\">{resolved_count}</div>
-        </div>
-        <div class=\"card\">
-          <div class=\"card-title\">Closed</div>
-          <div style=\"font-size:1.4rem;font-weight:700;margin-top:0.3rem;\">{closed_count}</div>
-        </div>
-        <div class=\"card\">
-          <div class=\"card-title\">Unassigned</div>
-          <div style=\"font-size:1.4rem;font-weight:700;margin-top:0.3rem;\">{unassigned_count}</div>
-        </div>
-        <div class=\"card\">
-          <div class=\"card-title\">Assigned to Me</div>
-          <div style=\"font-size:1.4rem;font-weight:700;margin-top:0.3rem;\">{my_count}</div>
-        </div>
-      </div>
+        unread_map = dict(
+            db.session.query(TicketMessage.ticket_id, func.count())
+            .filter(
+                TicketMessage.ticket_id.in_(ticket_ids),
+                TicketMessage.is_read_admin.isnot(True),
+                TicketMessage.sender_id != admin.id,
+            )
+            .group_by(TicketMessage.ticket_id)
+            .all()
+        )
 
-      
-<div class=\"form-card\">
-        <form id=\"ticket-filter-form\" method=\"get\" style=\"display:flex;flex-wrap:wrap;gap:0.6rem;align-items:flex-end;\">
-          <div class=\"form-group\" style=\"min-width:120px;\">
-            <label class=\"form-label\">Tahun</label>
-            <input name=\"year\" class=\"form-input\" placeholder=\"contoh: 2025\" value=\"{year_filter}\" />
-          </div>
-          <div class=\"form-group\" style=\"min-width:120px;\">
-            <label class=\"form-label\">User</label>
-            <input name=\"user\" class=\"form-input\" placeholder=\"Nama user\" value=\"{request.args.get('user', '')}\" />
-          </div>
-          <div class=\"form-group\" style=\"min-width:120px;\">
-            <label class=\"form-label\">Admin</label>
-            <input name=\"admin\" class=\"form-input\" placeholder=\"Nama admin\" value=\"{request.args.get('admin', '')}\" />
-          </div>
-          <div class=\"form-group\" style=\"min-width:160px;\">
-            <label class=\"form-label\">Title</label>
-            <input name=\"title\" class=\"form-input\" placeholder=\"Judul mengandung...\" value=\"{request.args.get('title', '')}\" />
-          </div>
-          <div class=\"form-group\">
-            <label class=\"form-label\">Status</label>
-            <select name=\"status\" class=\"form-select\">
-              <option value=\"all\" {'selected' if status_filter == 'all' else ''}>Semua</option>
-              <option value=\"open\" {'selected' if status_filter == 'open' else ''}>Open</option>
-              <option value=\"in_progress\" {'selected' if status_filter == 'in_progress' else ''}>In Progress</option>
-              <option value=\"resolved\" {'selected' if status_filter == 'resolved' else ''}>Resolved</option>
-              <option value=\"closed\" {'selected' if status_filter == 'closed' else ''}>Closed</option>
-            </select>
-          </div>
-        </form>
+    rows = []
+    for t, desc in tickets:
+        rows.append({
+            "id": t.id,
+            "ticket_no": format_ticket_number(t),
+            "created": _fmt_wib(t.created_at) if t.created_at else "-",
+            "completed": _fmt_wib(t.completed_at) if t.completed_at else "-",
+            "assigned_name": t.assigned_admin.full_name if getattr(t, "assigned_admin", None) else "-",
+            "user_name": t.user.full_name if t.user else "-",
+            "unread": unread_map.get(t.id, 0),
+            "category": t.category or "-",
+            "short_desc": _short_desc(desc, 160),
+            "status": t.status,
+            "status_label": TICKET_STATUS_LABEL.get(t.status, t.status),
+        })
 
-        <div class=\"filter-row\">
-          <div class=\"filter-row-left\">
-            <span style=\"color:var(--text-muted);\">Quick status filter:</span>
-            {filters_html}
-          </div>
-          <div class=\"filter-row-right\">
-            <button class=\"btn btn-primary btn-sm\" type=\"submit\" form=\"ticket-filter-form\">Apply Filter</button>
-            <a href=\"{url_for('admin_tickets')}\" class=\"btn btn-ghost btn-sm\">Reset Filter</a>
-            <a href=\"{url_for('admin_tickets_export', status=status_filter, year=year_filter, user=request.args.get('user',''), admin=request.args.get('admin',''), title=request.args.get('title',''))}\" class=\"btn btn-ghost btn-sm\">Download Excel</a>
-          </div>
-        </div>
-      </div><div class=\"table-surface\">
-        <div class=\"table-scroll\">
-          
-          <table class="tickets-table admin-tickets-table">
-            <thead>
-              <tr>
-                <th class="col-created">Created</th>
-                <th class="col-ticket">No. Ticket</th>
-                <th class="col-category">Kategori</th>
-                <th class="col-user">User</th>
-                <th class="col-admin">Admin</th>
-                <th class="col-desc">Deskripsi</th>
-                <th class="col-status">Status</th>
-                <th class="col-completed">Completed</th>
-                <th class="col-actions">Actions</th>
-              </tr>
-</thead>
-            <tbody>
-              {rows}
-            </tbody>
-          </table>
-        </div>
-      </div>
-    </div>
-    """
+    user_q = request.args.get("user", "")
+    admin_q = request.args.get("admin", "")
+    title_q = request.args.get("title", "")
+    body = render_body(
+        ADMIN_TICKETS_TMPL,
+        tickets=rows,
+        counts=counts,
+        status_filter=status_filter,
+        status_options=ADMIN_TICKET_STATUS_OPTIONS,
+        year_filter=year_filter,
+        user_q=user_q,
+        admin_q=admin_q,
+        title_q=title_q,
+        base_url=url_for("admin_tickets"),
+        export_url=url_for(
+            "admin_tickets_export", status=status_filter, year=year_filter, user=user_q, admin=admin_q, title=title_q
+        ),
+        next_url=url_for(
+            "admin_tickets",
+            cursor=next_cursor,
+            status=status_filter,
+            year=year_filter,
+            user=user_q,
+            admin=admin_q,
+            title=title_q,
+        )
+        if next_cursor
+        else None,
+    )
     return render_page(body, title="Admin — Kendala Sistem", active_nav="admin_tickets")
 
 
@@ -3949,13 +4483,19 @@ def admin_tickets():
 def admin_ticket_notes(ticket_id):
     """Return admin notes for a ticket as JSON (used by modal viewer)."""
     ticket = Ticket.query.get_or_404(ticket_id)
-    return jsonify(
+    resp = jsonify(
         {
             "ticket_id": ticket.id,
             "ticket_no": format_ticket_number(ticket),
             "notes": ticket.admin_note or "",
         }
     )
+    # ETag dari isi catatan: modal yang dibuka ulang cukup dapat 304 selama catatan belum berubah.
+    # no-cache (bukan max-age) supaya catatan yang baru disimpan langsung terlihat.
+    resp.add_etag()
+    resp.cache_control.private = True
+    resp.cache_control.no_cache = True
+    return resp.make_conditional(request)
 
 
 @app.route("/admin/tickets/export")
@@ -3964,38 +4504,9 @@ def admin_ticket_notes(ticket_id):
 def admin_tickets_export():
     from openpyxl import Workbook
 
-    status_filter = request.args.get("status", "all").strip().lower()
-    user_filter = (request.args.get("user") or "").strip().lower()
-    admin_filter = (request.args.get("admin") or "").strip().lower()
-    title_filter = (request.args.get("title") or "").strip().lower()
-    year_filter = (request.args.get("year") or "").strip()
-
-    q = Ticket.query
-    if status_filter != "all":
-        q = q.filter_by(status=status_filter)
-
-    tickets = q.order_by(Ticket.created_at.desc()).all()
-
-    filtered = []
-    for tkt in tickets:
-        u_name = (tkt.user.full_name if tkt.user and tkt.user.full_name else "").lower()
-        a_name = (tkt.assigned_admin.full_name if getattr(tkt, "assigned_admin", None) and tkt.assigned_admin.full_name else "").lower()
-        title = (tkt.title or "").lower()
-        year_str = tkt.created_at.astimezone(WIB).strftime("%Y") if tkt.created_at else ""
-
-        if user_filter and user_filter not in u_name:
-            continue
-        if admin_filter and admin_filter not in a_name:
-            continue
-        if title_filter and title_filter not in title:
-            continue
-        if year_filter and year_filter != year_str:
-            continue
-        filtered.append(tkt)
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Tickets"
+    # Write-only workbook + yield_per: baris di-stream per batch, tidak ada grid Cell di memori
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Tickets")
     header = [
         "TicketNumber",
         "User",
@@ -4008,32 +4519,97 @@ def admin_tickets_export():
     ]
     ws.append(header)
 
-    for tkt in filtered:
-        created_wib = tkt.created_at.astimezone(WIB).strftime("%Y-%m-%d %H:%M:%S") if tkt.created_at else ""
-        updated_wib = tkt.updated_at.astimezone(WIB).strftime("%Y-%m-%d %H:%M:%S") if tkt.updated_at else ""
+    for tkt in _admin_ticket_query(request.args).yield_per(500):
+        created_wib = _fmt_wib(tkt.created_at, "%Y-%m-%d %H:%M:%S") if tkt.created_at else ""
+        updated_wib = _fmt_wib(tkt.updated_at, "%Y-%m-%d %H:%M:%S") if tkt.updated_at else ""
         last_note = (tkt.admin_note or "").splitlines()[-1] if tkt.admin_note else ""
-        row = [
+        ws.append((
             format_ticket_number(tkt),
             tkt.user.full_name if tkt.user else "",
             tkt.assigned_admin.full_name if getattr(tkt, "assigned_admin", None) else "",
             tkt.title or "",
-            tkt.status.replace("_", " ").title(),
+            TICKET_STATUS_LABEL.get(tkt.status, tkt.status),
             created_wib,
             updated_wib,
             last_note,
-        ]
-        ws.append(row)
+        ))
+
+    return send_xlsx(wb, "bsi_scholarship_tickets_admin.xlsx")
+
+
+ADMIN_POSTS_HTML = """
+    <div class="surface">
+      <div class="page-header">
+        <div>
+          <h1 class="page-title">Admin — Postingan Kabar & Dokumentasi</h1>
+          <p class="page-subtitle">Posting pengumuman, info program, dan dokumentasi kegiatan yang tampil di menu Info.</p>
+        </div>
+      </div>
+
+      <div class="form-card">
+        <h2 class="page-title" style="font-size:1rem;">Buat Postingan Baru</h2>
+        <form method="post" style="margin-top:0.6rem;">
+          <div class="form-group">
+            <label class="form-label">Judul</label>
+            <input name="title" class="form-input" required>
+          </div>
+          <div class="form-group">
+            <label class="form-label">Kategori</label>
+            <select name="category" class="form-select">
+              <option value="news">Kabar / News</option>
+              <option value="dokumentasi">Dokumentasi Kegiatan</option>
+            </select>
+          </div>
+          <div class="form-group">
+            <label class="form-label">Isi / Deskripsi</label>
+            <textarea name="content" class="form-input" style="min-height:80px;" placeholder="Tuliskan informasi lengkap atau ringkasan kegiatan."></textarea>
+          </div>
+          <div class="form-group">
+            <label class="form-label">URL Gambar (opsional)</label>
+            <input name="image_url" class="form-input" placeholder="contoh: https://... .jpg">
+          </div>
+          <div class="form-group">
+            <label class="form-label">URL Video (opsional)</label>
+            <input name="video_url" class="form-input" placeholder="contoh: tautan YouTube / Drive">
+          </div>
+          <div class="form-group">
+            <label class="form-label">Berlaku Sampai</label>
+            <input name="valid_until_text" class="form-input" placeholder="contoh: 31 Des 2025 atau s/d pengumuman berikutnya">
+          </div>
+          <button class="btn btn-primary" type="submit">Publikasikan</button>
+        </form>
+      </div>
+
+      <div class="table-surface">
+        <div class="table-scroll">
+          <table>
+            <thead>
+              <tr>
+                <th>Judul</th>
+                <th>Kategori</th>
+                <th>Dipublikasikan</th>
+                <th>Dibuat</th>
+                <th>Pendaftar</th>
+              </tr>
+            </thead>
+            <tbody>
+              {%- for post in posts %}
+              <tr>
+                <td>{{ post.title }}</td>
+                <td>{{ post.category or '-' }}</td>
+                <td>{{ "Ya" if post.is_published else "Tidak" }}</td>
+                <td>{{ post.created }}</td>
+                <td>{{ post.reg_count }} pendaftar</td>
+              </tr>
+              {%- endfor %}
+            </tbody>
+          </table>
+        </div>
+      </div>
+    </div>
+"""
+ADMIN_POSTS_TMPL = _compile_template(ADMIN_POSTS_HTML)
 
-    mem = BytesIO()
-    wb.save(mem)
-    mem.seek(0)
-    filename = "bsi_scholarship_tickets_admin.xlsx"
-    return send_file(
-        mem,
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        as_attachment=True,
-        download_name=filename,
-    )
 
 @app.route("/admin/posts", methods=["GET", "POST"])
 @login_required
@@ -4061,6 +4637,7 @@ def admin_posts():
             created_by=admin.id,
         )
         db.session.add(post)
+        bump_news_version()
         db.session.commit()
         log_action(admin.id, "admin_add_post", f"{category}:{title}")
         flash("Postingan berhasil ditambahkan.", "success")
@@ -4068,83 +4645,18 @@ def admin_posts():
 
     posts = Post.query.order_by(Post.created_at.desc()).all()
 
-    rows = ""
-    for p in posts:
-        created = p.created_at.astimezone(WIB).strftime("%d %b %Y") if p.created_at else ""
-        reg_count = PostRegistration.query.filter_by(post_id=p.id).count()
-        rows += f"""
-        <tr>
-          <td>{p.title}</td>
-          <td>{p.category or '-'}</td>
-          <td>{"Ya" if p.is_published else "Tidak"}</td>
-          <td>{created}</td>
-          <td>{reg_count} pendaftar</td>
-        </tr>
-        """
-
-    body = f"""
-    <div class=\"surface\">
-      <div class=\"page-header\">
-        <div>
-          <h1 class=\"page-title\">Admin — Postingan Kabar & Dokumentasi</h1>
-          <p class=\"page-subtitle\">Posting pengumuman, info program, dan dokumentasi kegiatan yang tampil di menu Info.</p>
-        </div>
-      </div>
-
-      <div class=\"form-card\">
-        <h2 class=\"page-title\" style=\"font-size:1rem;\">Buat Postingan Baru</h2>
-        <form method=\"post\" style=\"margin-top:0.6rem;\">
-          <div class=\"form-group\">
-            <label class=\"form-label\">Judul</label>
-            <input name=\"title\" class=\"form-input\" required>
-          </div>
-          <div class=\"form-group\">
-            <label class=\"form-label\">Kategori</label>
-            <select name=\"category\" class=\"form-select\">
-              <option value=\"news\">Kabar / News</option>
-              <option value=\"dokumentasi\">Dokumentasi Kegiatan</option>
-            </select>
-          </div>
-          <div class=\"form-group\">
-            <label class=\"form-label\">Isi / Deskripsi</label>
-            <textarea name=\"content\" class=\"form-input\" style=\"min-height:80px;\" placeholder=\"Tuliskan informasi lengkap atau ringkasan kegiatan.\"></textarea>
-          </div>
-          <div class=\"form-group\">
-            <label class=\"form-label\">URL Gambar (opsional)</label>
-            <input name=\"image_url\" class=\"form-input\" placeholder=\"contoh: https://... .jpg\">
-          </div>
-          <div class=\"form-group\">
-            <label class=\"form-label\">URL Video (opsional)</label>
-            <input name=\"video_url\" class=\"form-input\" placeholder=\"contoh: tautan YouTube / Drive\">
-          </div>
-          <div class=\"form-group\">
-            <label class=\"form-label\">Berlaku Sampai</label>
-            <input name=\"valid_until_text\" class=\"form-input\" placeholder=\"contoh: 31 Des 2025 atau s/d pengumuman berikutnya\">
-          </div>
-          <button class=\"btn btn-primary\" type=\"submit\">Publikasikan</button>
-        </form>
-      </div>
+    rows = [
+        {
+            "title": p.title,
+            "category": p.category,
+            "is_published": p.is_published,
+            "created": _fmt_dmy(p.created_at) if p.created_at else "",
+            "reg_count": p.registration_count or 0,
+        }
+        for p in posts
+    ]
 
-      <div class=\"table-surface\">
-        <div class=\"table-scroll\">
-          <table>
-            <thead>
-              <tr>
-                <th>Judul</th>
-                <th>Kategori</th>
-                <th>Dipublikasikan</th>
-                <th>Dibuat</th>
-                <th>Pendaftar</th>
-              </tr>
-            </thead>
-            <tbody>
-              {rows}
-            </tbody>
-          </table>
-        </div>
-      </div>
-    </div>
-    """
+    body = render_body(ADMIN_POSTS_TMPL, posts=rows)
     return render_page(body, title="Admin - Postingan", active_nav="admin_posts")
 
 
@@ -4153,185 +4665,296 @@ def admin_posts():
 # ============================================================
 
 
-@app.route("/news")
-@login_required
-def news_list():
-    posts = (
-        Post.query.filter_by(is_published=True)
-        .order_by(Post.created_at.desc())
-        .all()
-    )
-
-    user = current_user()
+NEWS_VERSION_KEY = "news_version"
+NEWS_FEED_TTL = 60
 
-    cards = ""
-    for p in posts:
-        created = p.created_at.astimezone(WIB).strftime("%d %b %Y") if p.created_at else ""
-        category = p.category.title() if p.category else "News"
-        image_html = ""
-        if p.image_url:
-            image_html = f"<div style='margin-bottom:0.45rem;'><img src='{p.image_url}' alt='gambar' style='width:100%;border-radius:12px;max-height:160px;object-fit:cover;'></div>"
-        video_html = ""
-        if p.video_url:
-            video_html = f"<div style='margin-top:0.35rem;font-size:0.75rem;'><a href='{p.video_url}' target='_blank'>Lihat video / dokumentasi »</a></div>"
 
-        content_text = (p.content or "").replace("\n", " ")
-        if len(content_text) > 220:
-            content_preview = content_text[:220] + "..."
-        else:
-            content_preview = content_text
+def bump_news_version() -> None:
+    """Naikkan versi feed news di tabel settings (ikut commit pemanggil).
+    Versi dibaca semua worker, jadi cache body news_list lama di setiap proses ikut tidak terpakai.
+    Mengunci baris settings sampai commit: panggil tepat sebelum commit, dan hanya untuk perubahan
+    yang terlihat user lain (bukan bookmark; status milik user tidak ikut di-cache).
+    """
+    db.session.execute(
+        text(
+            "INSERT INTO settings (key, value) VALUES (:key, '1') "
+            "ON CONFLICT (key) DO UPDATE SET value = (settings.value::integer + 1)::text"
+        ),
+        {"key": NEWS_VERSION_KEY},
+    )
 
-        reg_count = PostRegistration.query.filter_by(post_id=p.id).count()
-        already_reg = False
-        if user:
-            already_reg = PostRegistration.query.filter_by(post_id=p.id, user_id=user.id).first() is not None
 
-        daftar_btn = ""
-        if already_reg:
-            daftar_btn = "<span style='font-size:0.75rem;color:var(--text-muted);'>Anda sudah mendaftar.</span>"
-        else:
-            daftar_btn = f"""
-            <form method='post' action='{url_for('news_register', post_id=p.id)}' style='margin-top:0.5rem;'>
-              <button class='btn btn-primary' type='submit'>Daftar</button>
-            </form>
-            """
-
-        # Reactions & bookmarks
-        like_count = PostReaction.query.filter_by(post_id=p.id, reaction_type="like").count()
-        dislike_count = PostReaction.query.filter_by(post_id=p.id, reaction_type="dislike").count()
-        user_reaction = None
-        user_bookmark = None
-        if user:
-            user_reaction = PostReaction.query.filter_by(post_id=p.id, user_id=user.id).first()
-            user_bookmark = PostBookmark.query.filter_by(post_id=p.id, user_id=user.id).first()
-
-        like_active = "font-weight:700;" if (user_reaction and user_reaction.reaction_type == "like") else ""
-        dislike_active = "font-weight:700;" if (user_reaction and user_reaction.reaction_type == "dislike") else ""
-        bookmark_label = "Disimpan" if user_bookmark else "Simpan"
-
-        # Comments
-        comments = PostComment.query.filter_by(post_id=p.id).order_by(PostComment.created_at.asc()).all()
-        replies_by_parent = {}
-        for c in comments:
-            if c.parent_id:
-                replies_by_parent.setdefault(c.parent_id, []).append(c)
-
-        def render_comment(c, indent_level=0):
-            pad = 0.0 + 1.2 * indent_level
-            ts = c.created_at.astimezone(WIB).strftime("%d %b %Y, %H:%M") if c.created_at else ""
-            name = c.user.full_name if c.user and c.user.full_name else "User"
-            content_html = c.content.replace("\n","<br>")
-            return f"""
-            <div style="margin-top:0.35rem;padding:0.4rem 0.5rem;border-radius:10px;background:rgba(148,163,184,0.08);margin-left:{pad}rem;">
-              <div style="font-size:0.78rem;font-weight:600;">{name}</div>
-              <div style="font-size:0.7rem;color:var(--text-muted);margin-bottom:0.2rem;">{ts}</div>
-              <div style="font-size:0.8rem;">{content_html}</div>
+# Thread komentar satu post: bagian feed yang paling mahal di-render, sama untuk semua user
+NEWS_COMMENTS_HTML = """
+    {%- macro render_comment(c, level, replies, comment_url) %}
+            <div style="margin-top:0.35rem;padding:0.4rem 0.5rem;border-radius:10px;background:rgba(148,163,184,0.08);margin-left:{{ 1.2 * level }}rem;">
+              <div style="font-size:0.78rem;font-weight:600;">{{ c.name }}</div>
+              <div style="font-size:0.7rem;color:var(--text-muted);margin-bottom:0.2rem;">{{ c.ts }}</div>
+              <div style="font-size:0.8rem;">{{ c.content_html }}</div>
               <div style="margin-top:0.25rem;">
-                <form method='post' action='{url_for('news_comment', post_id=p.id)}' style="display:inline-flex;gap:0.25rem;align-items:center;">
-                  <input type="hidden" name="parent_id" value="{c.id}">
+                <form method='post' action='{{ comment_url }}' style="display:inline-flex;gap:0.25rem;align-items:center;">
+                  <input type="hidden" name="parent_id" value="{{ c.id }}">
                   <input type="text" name="content" class="form-input" style="font-size:0.75rem;padding:0.15rem 0.4rem;height:28px;" placeholder="Balas..." required>
                   <button class="btn btn-primary" type="submit" style="padding:0.2rem 0.6rem;font-size:0.7rem;">Kirim</button>
                 </form>
               </div>
             </div>
-            """
+            {%- for r in replies.get(c.id, ()) %}{{ render_comment(r, level + 1, replies, comment_url) }}{% endfor %}
+    {%- endmacro %}
+              {%- for c in top_comments %}{{ render_comment(c, 0, replies, comment_url) }}
+              {%- else %}
+              <p style='font-size:0.75rem;color:var(--text-muted);'>Belum ada komentar. Jadilah yang pertama memberikan tanggapan.</p>
+              {%- endfor %}
+"""
+NEWS_COMMENTS_TMPL = _compile_template(NEWS_COMMENTS_HTML)
 
-        comments_html = ""
-        top_comments = [c for c in comments if c.parent_id is None]
-        for c in top_comments:
-            comments_html += render_comment(c, indent_level=0)
-            for r in replies_by_parent.get(c.id, []):
-                comments_html += render_comment(r, indent_level=1)
 
-        comment_count = len(comments)
+NEWS_LIST_HTML = """
+    <div class="surface">
+      <h1 class="page-title">Info Program & Dokumentasi Kegiatan</h1>
+      <p class="page-subtitle">Lihat pengumuman terbaru, info kegiatan, daftar program, dan berdiskusi melalui komentar.</p>
 
-        comment_block = f"""
-        <div style="margin-top:0.6rem;border-top:1px solid var(--border-soft);padding-top:0.45rem;">
-          <div style="font-size:0.78rem;color:var(--text-muted);margin-bottom:0.3rem;">
-            💬 {comment_count} komentar
+      <div class="news-grid" style="margin-top:1rem;">
+        {%- for p in posts %}
+        <div class="news-card">
+          {%- if p.image_url %}
+          <div style='margin-bottom:0.45rem;'><img src='{{ p.image_url }}' alt='gambar' style='width:100%;border-radius:12px;max-height:160px;object-fit:cover;'></div>
+          {%- endif %}
+          <div class="news-title">{{ p.title }}</div>
+          <div class="news-meta">{{ p.category }} • Diposting: {{ p.created }}</div>
+          <div class="news-content">{{ p.content_preview }}</div>
+          {%- if p.video_url %}
+          <div style='margin-top:0.35rem;font-size:0.75rem;'><a href='{{ p.video_url }}' target='_blank'>Lihat video / dokumentasi »</a></div>
+          {%- endif %}
+          <div style="margin-top:0.5rem;font-size:0.75rem;color:var(--text-muted);">
+            {{ p.reg_count }} pendaftar
           </div>
-          <div>
-            {comments_html or "<p style='font-size:0.75rem;color:var(--text-muted);'>Belum ada komentar. Jadilah yang pertama memberikan tanggapan.</p>"}
+          {%- if p.id in user_regs %}
+          <span style='font-size:0.75rem;color:var(--text-muted);'>Anda sudah mendaftar.</span>
+          {%- else %}
+          <form method='post' action='{{ p.register_url }}' style='margin-top:0.5rem;'>
+            <button class='btn btn-primary' type='submit'>Daftar</button>
+          </form>
+          {%- endif %}
+          <div style="margin-top:0.55rem;display:flex;align-items:center;justify-content:space-between;font-size:0.78rem;">
+            <div style="display:flex;gap:0.4rem;align-items:center;">
+              <form method="post" action="{{ p.react_url }}">
+                <input type="hidden" name="reaction" value="like">
+                <button type="submit" class="btn btn-ghost" style="padding:0.2rem 0.45rem;font-size:0.75rem;{{ 'font-weight:700;' if user_reactions.get(p.id) == 'like' }}">👍 {{ p.like_count }}</button>
+              </form>
+              <form method="post" action="{{ p.react_url }}">
+                <input type="hidden" name="reaction" value="dislike">
+                <button type="submit" class="btn btn-ghost" style="padding:0.2rem 0.45rem;font-size:0.75rem;{{ 'font-weight:700;' if user_reactions.get(p.id) == 'dislike' }}">👎 {{ p.dislike_count }}</button>
+              </form>
+            </div>
+            <div style="display:flex;gap:0.3rem;align-items:center;">
+              <form method="post" action="{{ p.bookmark_url }}">
+                <button type="submit" class="btn btn-ghost" style="padding:0.2rem 0.55rem;font-size:0.75rem;">
+                  ⭐ {{ "Disimpan" if p.id in user_bookmarks else "Simpan" }}
+                </button>
+              </form>
+            </div>
           </div>
-          <div style="margin-top:0.45rem;">
-            <form method="post" action="{url_for('news_comment', post_id=p.id)}">
-              <input type="hidden" name="parent_id" value="">
-              <textarea name="content" class="form-input" style="min-height:40px;font-size:0.78rem;" placeholder="Tulis komentar Anda..." required></textarea>
-              <div style="margin-top:0.3rem;display:flex;justify-content:flex-end;">
-                <button class="btn btn-primary" type="submit">Kirim Komentar</button>
-              </div>
-            </form>
+          <div style="margin-top:0.6rem;border-top:1px solid var(--border-soft);padding-top:0.45rem;">
+            <div style="font-size:0.78rem;color:var(--text-muted);margin-bottom:0.3rem;">
+              💬 {{ p.comment_count }} komentar
+            </div>
+            <div>
+              {{- p.comments_html }}
+            </div>
+            <div style="margin-top:0.45rem;">
+              <form method="post" action="{{ p.comment_url }}">
+                <input type="hidden" name="parent_id" value="">
+                <textarea name="content" class="form-input" style="min-height:40px;font-size:0.78rem;" placeholder="Tulis komentar Anda..." required></textarea>
+                <div style="margin-top:0.3rem;display:flex;justify-content:flex-end;">
+                  <button class="btn btn-primary" type="submit">Kirim Komentar</button>
+                </div>
+              </form>
+            </div>
           </div>
         </div>
-        """
+        {%- else %}
+        <p style='font-size:0.8rem;color:var(--text-muted);'>Belum ada kabar atau dokumentasi yang dipublikasikan.</p>
+        {%- endfor %}
+      </div>
+    </div>
+"""
+NEWS_LIST_TMPL = _compile_template(NEWS_LIST_HTML)
 
-        reaction_block = f"""
-        <div style="margin-top:0.55rem;display:flex;align-items:center;justify-content:space-between;font-size:0.78rem;">
-          <div style="display:flex;gap:0.4rem;align-items:center;">
-            <form method="post" action="{url_for('news_react', post_id=p.id)}">
-              <input type="hidden" name="reaction" value="like">
-              <button type="submit" class="btn btn-ghost" style="padding:0.2rem 0.45rem;font-size:0.75rem;{like_active}">👍 {like_count}</button>
-            </form>
-            <form method="post" action="{url_for('news_react', post_id=p.id)}">
-              <input type="hidden" name="reaction" value="dislike">
-              <button type="submit" class="btn btn-ghost" style="padding:0.2rem 0.45rem;font-size:0.75rem;{dislike_active}">👎 {dislike_count}</button>
-            </form>
-          </div>
-          <div style="display:flex;gap:0.3rem;align-items:center;">
-            <form method="post" action="{url_for('news_bookmark', post_id=p.id)}">
-              <button type="submit" class="btn btn-ghost" style="padding:0.2rem 0.55rem;font-size:0.75rem;">
-                ⭐ {bookmark_label}
-              </button>
-            </form>
-          </div>
-        </div>
-        """
 
-        cards += f"""
-        <div class="news-card">
-          {image_html}
-          <div class="news-title">{p.title}</div>
-          <div class="news-meta">{category} • Diposting: {created}</div>
-          <div class="news-content">{content_preview}</div>
-          {video_html}
-          <div style="margin-top:0.5rem;font-size:0.75rem;color:var(--text-muted);">
-            {reg_count} pendaftar
-          </div>
-          {daftar_btn}
-          {reaction_block}
-          {comment_block}
-        </div>
-        """
+@lru_cache(maxsize=4)
+def _news_feed_shared(version: str, ttl_bucket: int) -> tuple:
+    """Data feed news yang sama untuk semua user: post + thread komentar yang sudah di-render.
+    version & ttl_bucket hanya kunci cache: version berubah saat ada post/komentar/reaksi/pendaftaran
+    baru, ttl_bucket setiap NEWS_FEED_TTL detik (mis. nama penulis komentar yang diubah).
+    Status milik user (daftar/reaksi/bookmark) sengaja tidak di-cache, lihat _news_user_state.
+    """
+    posts = (
+        Post.query.filter_by(is_published=True)
+        .order_by(Post.created_at.desc())
+        .all()
+    )
 
-    body = f"""
-    <div class=\"surface\">
-      <h1 class=\"page-title\">Info Program & Dokumentasi Kegiatan</h1>
-      <p class=\"page-subtitle\">Lihat pengumuman terbaru, info kegiatan, daftar program, dan berdiskusi melalui komentar.</p>
+    # Jumlah pendaftar/reaksi dibaca dari kolom counter Post. Komentar diambil sekali untuk
+    # semua post (IN post_ids), bukan beberapa query per post di dalam loop
+    post_ids = [p.id for p in posts]
+    top_comments = defaultdict(list)
+    replies = defaultdict(list)
+    comment_counts = defaultdict(int)
+    if post_ids:
+        # Komentar + nama penulis dalam satu query berurutan (post_id, created_at) — dilayani
+        # ix_post_comments_post_created — lalu dikelompokkan top-level/balasan dalam satu pass
+        comment_rows = (
+            db.session.query(
+                PostComment.id,
+                PostComment.post_id,
+                PostComment.parent_id,
+                PostComment.content,
+                PostComment.content_html,
+                PostComment.created_at,
+                User.full_name,
+            )
+            .outerjoin(User, PostComment.user_id == User.id)
+            .filter(PostComment.post_id.in_(post_ids))
+            .order_by(PostComment.post_id, PostComment.created_at.asc())
+        )
+        for cid, pid, parent_id, content, content_html, created_at, author in comment_rows:
+            item = {
+                "id": cid,
+                "name": author or "User",
+                "ts": _fmt_wib(created_at) if created_at else "",
+                "content_html": Markup(content_html) if content_html is not None else _comment_html(content),
+            }
+            if parent_id:
+                replies[parent_id].append(item)
+            else:
+                top_comments[pid].append(item)
+            comment_counts[pid] += 1
 
-      <div class=\"news-grid\" style=\"margin-top:1rem;\">
-        {cards or "<p style='font-size:0.8rem;color:var(--text-muted);'>Belum ada kabar atau dokumentasi yang dipublikasikan.</p>"}
-      </div>
-    </div>
+    posts_ctx = []
+    for p in posts:
+        content_text = (p.content or "").replace("\n", " ")
+        if len(content_text) > 220:
+            content_text = content_text[:220] + "..."
+
+        comment_url = url_for("news_comment", post_id=p.id)
+        posts_ctx.append({
+            "id": p.id,
+            "title": p.title,
+            "category": p.category.title() if p.category else "News",
+            "created": _fmt_dmy(p.created_at) if p.created_at else "",
+            "content_preview": content_text,
+            "image_url": p.image_url,
+            "video_url": p.video_url,
+            "reg_count": p.registration_count or 0,
+            "like_count": p.like_count or 0,
+            "dislike_count": p.dislike_count or 0,
+            "comment_count": comment_counts.get(p.id, 0),
+            "comments_html": Markup(render_body(
+                NEWS_COMMENTS_TMPL,
+                top_comments=top_comments.get(p.id, ()),
+                replies=replies,
+                comment_url=comment_url,
+            )),
+            "register_url": url_for("news_register", post_id=p.id),
+            "comment_url": comment_url,
+            "react_url": url_for("news_react", post_id=p.id),
+            "bookmark_url": url_for("news_bookmark", post_id=p.id),
+        })
+
+    return tuple(posts_ctx), tuple(post_ids)
+
+
+def _news_user_state(user_id: int, post_ids) -> tuple:
+    """Status milik user (daftar/reaksi/bookmark) untuk post di feed, selalu segar dari database.
+    Satu query UNION ALL; dilewati total untuk viewer tanpa user atau feed kosong.
     """
+    user_regs = set()
+    user_reactions = {}
+    user_bookmarks = set()
+    if not user_id or not post_ids:
+        return user_regs, user_reactions, user_bookmarks
+
+    own_rows = union_all(
+        db.select(literal("reg"), PostRegistration.post_id, null()).where(
+            PostRegistration.user_id == user_id, PostRegistration.post_id.in_(post_ids)
+        ),
+        db.select(literal("react"), PostReaction.post_id, PostReaction.reaction_type).where(
+            PostReaction.user_id == user_id, PostReaction.post_id.in_(post_ids)
+        ),
+        db.select(literal("bookmark"), PostBookmark.post_id, null()).where(
+            PostBookmark.user_id == user_id, PostBookmark.post_id.in_(post_ids)
+        ),
+    )
+    for kind, pid, reaction_type in db.session.execute(own_rows):
+        if kind == "reg":
+            user_regs.add(pid)
+        elif kind == "react":
+            user_reactions[pid] = reaction_type
+        else:
+            user_bookmarks.add(pid)
+    return user_regs, user_reactions, user_bookmarks
+
+
+@app.route("/news")
+@login_required
+def news_list():
+    user = current_user()
+    posts_ctx, post_ids = _news_feed_shared(
+        get_setting(NEWS_VERSION_KEY, "0"),
+        int(time.monotonic() // NEWS_FEED_TTL),
+    )
+    user_regs, user_reactions, user_bookmarks = _news_user_state(user.id if user else 0, post_ids)
+    body = render_body(
+        NEWS_LIST_TMPL,
+        posts=posts_ctx,
+        user_regs=user_regs,
+        user_reactions=user_reactions,
+        user_bookmarks=user_bookmarks,
+    )
     return render_page(body, title="Info Beasiswa", active_nav="news")
 
 
 
+def _comment_html(content: str) -> Markup:
+    """Escape isi komentar lalu ganti newline dengan <br> (disimpan di PostComment.content_html)."""
+    return Markup(str(escape(content)).replace("\n", "<br>"))
+
+
+def _bump_post_counter(post_id: int, column, delta: int) -> None:
+    """UPDATE posts SET <column> = <column> + delta secara atomik, ikut commit pemanggil."""
+    Post.query.filter_by(id=post_id).update({column: column + delta}, synchronize_session=False)
+
+
+def _reaction_counter(reaction_type: str):
+    return Post.like_count if reaction_type == "like" else Post.dislike_count
+
+
 @app.route("/news/register/<int:post_id>", methods=["POST"])
 @login_required
 def news_register(post_id: int):
     user = current_user()
-    post = Post.query.get_or_404(post_id)
-
-    existing = PostRegistration.query.filter_by(post_id=post.id, user_id=user.id).first()
-    if existing:
+    post = db.session.get(Post, post_id, options=[load_only(Post.id, Post.title)]) or abort(404)
+
+    # INSERT ... ON CONFLICT DO NOTHING: cek "sudah daftar" + insert dalam satu statement,
+    # aman juga untuk submit ganda bersamaan. Target konflik eksplisit: tanpa index unik
+    # ix_post_registrations_post_user statement ini error, bukan diam-diam menyisipkan duplikat.
+    # Counter hanya dinaikkan jika INSERT benar-benar mengembalikan baris.
+    inserted = db.session.execute(
+        pg_insert(PostRegistration)
+        .values(user_id=user.id, post_id=post.id, created_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=[PostRegistration.post_id, PostRegistration.user_id])
+        .returning(PostRegistration.id)
+    ).first()
+    if not inserted:
+        db.session.rollback()
         flash("Anda sudah terdaftar pada postingan ini.", "success")
         return redirect(url_for("news_list"))
 
-    reg = PostRegistration(user_id=user.id, post_id=post.id)
-    db.session.add(reg)
+    _bump_post_counter(post.id, Post.registration_count, 1)
+    log_action(user.id, "register_post", f"{post.id}:{post.title}", commit=False)
+    bump_news_version()
     db.session.commit()
-    log_action(user.id, "register_post", f"{post.id}:{post.title}")
     flash("Pendaftaran berhasil dicatat.", "success")
     return redirect(url_for("news_list"))
 
@@ -4339,7 +4962,7 @@ def news_register(post_id: int):
 @login_required
 def news_comment(post_id: int):
     user = current_user()
-    post = Post.query.get_or_404(post_id)
+    post = db.session.get(Post, post_id, options=[load_only(Post.id, Post.title)]) or abort(404)
     content = request.form.get("content", "").strip()
     parent_id_raw = request.form.get("parent_id", "").strip()
     parent_id = int(parent_id_raw) if parent_id_raw.isdigit() else None
@@ -4348,20 +4971,26 @@ def news_comment(post_id: int):
         flash("Komentar tidak boleh kosong.", "danger")
         return redirect(url_for("news_list"))
 
-    if parent_id:
-        parent = PostComment.query.filter_by(id=parent_id, post_id=post.id).first()
-        if not parent:
-            parent_id = None
-
-    cmt = PostComment(
-        post_id=post.id,
-        user_id=user.id,
-        parent_id=parent_id,
-        content=content,
-    )
-    db.session.add(cmt)
-    db.session.commit()
-    log_action(user.id, "comment_post", f"{post.id}:{post.title}")
+    # parent_id tidak di-SELECT dulu: FK fk_post_comments_parent menolak parent yang tidak ada
+    # atau milik post lain, lalu komentar disimpan ulang sebagai top-level
+    for attempt_parent_id in (parent_id, None) if parent_id else (None,):
+        try:
+            db.session.add(PostComment(
+                post_id=post.id,
+                user_id=user.id,
+                parent_id=attempt_parent_id,
+                content=content,
+                content_html=str(_comment_html(content)),
+            ))
+            # Komentar + log dalam satu transaksi: satu commit
+            log_action(user.id, "comment_post", f"{post.id}:{post.title}", commit=False)
+            bump_news_version()
+            db.session.commit()
+            break
+        except IntegrityError:
+            db.session.rollback()
+            if attempt_parent_id is None:
+                raise
     flash("Komentar berhasil dikirim.", "success")
     return redirect(url_for("news_list"))
 
@@ -4370,27 +4999,47 @@ def news_comment(post_id: int):
 @login_required
 def news_react(post_id: int):
     user = current_user()
-    post = Post.query.get_or_404(post_id)
+    post = db.session.get(Post, post_id, options=[load_only(Post.id, Post.title)]) or abort(404)
     reaction = request.form.get("reaction", "like")
     if reaction not in ("like", "dislike"):
         flash("Aksi tidak dikenali.", "danger")
         return redirect(url_for("news_list"))
 
-    existing = PostReaction.query.filter_by(post_id=post.id, user_id=user.id).first()
-    if existing:
-        if existing.reaction_type == reaction:
-            db.session.delete(existing)
-            action = "remove_reaction"
+    # Klik reaksi yang sama = batalkan: DELETE langsung, tanpa SELECT dulu
+    removed = db.session.execute(
+        delete(PostReaction)
+        .where(
+            PostReaction.post_id == post.id,
+            PostReaction.user_id == user.id,
+            PostReaction.reaction_type == reaction,
+        )
+        .returning(PostReaction.id)
+    ).first()
+    if removed:
+        _bump_post_counter(post.id, _reaction_counter(reaction), -1)
+        action = "remove_reaction"
+    else:
+        # Belum ada reaksi -> INSERT; sudah ada reaksi lain -> ganti tipe (satu upsert).
+        # xmax = 0 hanya untuk baris yang baru di-insert.
+        stmt = pg_insert(PostReaction).values(
+            post_id=post.id, user_id=user.id, reaction_type=reaction, created_at=datetime.utcnow()
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PostReaction.post_id, PostReaction.user_id],
+            set_={"reaction_type": stmt.excluded.reaction_type},
+        ).returning(literal_column("xmax = 0"))
+        was_insert = db.session.execute(stmt).scalar()
+        if was_insert:
+            action = "add_reaction"
         else:
-            existing.reaction_type = reaction
+            other = "dislike" if reaction == "like" else "like"
+            _bump_post_counter(post.id, _reaction_counter(other), -1)
             action = "update_reaction"
-    else:
-        new_react = PostReaction(post_id=post.id, user_id=user.id, reaction_type=reaction)
-        db.session.add(new_react)
-        action = "add_reaction"
+        _bump_post_counter(post.id, _reaction_counter(reaction), 1)
 
+    log_action(user.id, action, f"{reaction}:{post.id}", commit=False)
+    bump_news_version()
     db.session.commit()
-    log_action(user.id, action, f"{reaction}:{post.id}")
     return redirect(url_for("news_list"))
 
 
@@ -4398,19 +5047,33 @@ def news_react(post_id: int):
 @login_required
 def news_bookmark(post_id: int):
     user = current_user()
-    post = Post.query.get_or_404(post_id)
-
-    existing = PostBookmark.query.filter_by(post_id=post.id, user_id=user.id).first()
-    if existing:
-        db.session.delete(existing)
+    post = db.session.get(Post, post_id, options=[load_only(Post.id, Post.title)]) or abort(404)
+
+    # Toggle: DELETE dulu; jika tidak ada yang terhapus, INSERT ... ON CONFLICT DO NOTHING
+    removed = db.session.execute(
+        delete(PostBookmark)
+        .where(PostBookmark.post_id == post.id, PostBookmark.user_id == user.id)
+        .returning(PostBookmark.id)
+    ).first()
+    if removed:
         action = "remove_bookmark"
     else:
-        bm = PostBookmark(post_id=post.id, user_id=user.id)
-        db.session.add(bm)
+        inserted = db.session.execute(
+            pg_insert(PostBookmark)
+            .values(post_id=post.id, user_id=user.id, created_at=datetime.utcnow())
+            .on_conflict_do_nothing(index_elements=[PostBookmark.post_id, PostBookmark.user_id])
+            .returning(PostBookmark.id)
+        ).first()
+        if not inserted:
+            # Sudah di-bookmark oleh request bersamaan: tidak ada yang berubah
+            db.session.rollback()
+            return redirect(url_for("news_list"))
         action = "add_bookmark"
 
+    # Bookmark hanya terlihat oleh user ini: tidak menyentuh news_version global
+    # (status bookmark dibaca segar oleh _news_user_state, tidak ikut cache feed)
+    log_action(user.id, action, str(post.id), commit=False)
     db.session.commit()
-    log_action(user.id, action, str(post.id))
     return redirect(url_for("news_list"))
 
 
@@ -4420,13 +5083,33 @@ def news_bookmark(post_id: int):
 # ============================================================
 
 
+# Naikkan setiap kali daftar stmts di run_migrations berubah
+SCHEMA_VERSION = "5"
+SCHEMA_VERSION_KEY = "schema_version"
+
+
+def _schema_is_current() -> bool:
+    """True jika settings.schema_version == SCHEMA_VERSION; False juga saat tabel settings belum ada."""
+    with db.engine.connect() as conn:
+        if conn.execute(text("SELECT to_regclass('settings')")).scalar() is None:
+            return False
+        current = conn.execute(
+            text("SELECT value FROM settings WHERE key = :key"), {"key": SCHEMA_VERSION_KEY}
+        ).scalar()
+    return current == SCHEMA_VERSION
+
+
 def run_migrations():
     """
     Simple, idempotent auto-migration.
     - Membuat tabel jika belum ada (CREATE TABLE IF NOT EXISTS)
     - Menambahkan kolom yang belum ada (ALTER TABLE ... ADD COLUMN IF NOT EXISTS)
     Tidak menghapus atau mengubah tipe kolom yang sudah ada.
+    Dilewati jika settings.schema_version sudah sama dengan SCHEMA_VERSION.
     """
+    if _schema_is_current():
+        return
+
     stmts = [
         # USERS
         """CREATE TABLE IF NOT EXISTS users (
@@ -4506,6 +5189,15 @@ def run_migrations():
             created_at  TIMESTAMP WITHOUT TIME ZONE DEFAULT NOW(),
             created_by  INTEGER
         )""",
+        "DROP INDEX IF EXISTS ix_program_forms_created_at_id",
+        """CREATE INDEX IF NOT EXISTS ix_program_forms_list ON program_forms (created_at DESC, id DESC)
+            INCLUDE (title, slug, icon, url, is_active)""",
+        "CREATE INDEX IF NOT EXISTS ix_program_forms_created_by ON program_forms (created_by)",
+
+        # TICKET MESSAGES (tabel dibuat oleh create_all)
+        "CREATE INDEX IF NOT EXISTS ix_ticket_messages_unread_user ON ticket_messages (ticket_id, is_read_user, sender_id)",
+        "CREATE INDEX IF NOT EXISTS ix_ticket_messages_unread_admin ON ticket_messages (ticket_id, is_read_admin, sender_id)",
+        "CREATE INDEX IF NOT EXISTS ix_ticket_messages_ticket_id ON ticket_messages (ticket_id, id)",
 
         # POSTS
         """CREATE TABLE IF NOT EXISTS posts (
@@ -4520,6 +5212,71 @@ def run_migrations():
             created_by   INTEGER
         )""",
 
+        # (post_id, user_id) WAJIB unik: ON CONFLICT di news_react/news_register/news_bookmark
+        # bergantung pada index ini. Duplikat data lama dihapus dulu (sisakan id terkecil), index
+        # non-unik sisa migrasi lama diganti. Jika index unik tetap gagal dibuat, migrasi gagal dan
+        # schema_version tidak ditandai. Dijalankan sebelum backfill counter agar duplikat tidak
+        # ikut terhitung; counter yang sudah ada dihitung ulang bila ada baris yang dihapus.
+        *[
+            f"""DO $$
+        DECLARE
+            removed INTEGER;
+        BEGIN
+            DELETE FROM {table} t USING {table} d
+            WHERE t.post_id = d.post_id AND t.user_id = d.user_id AND t.id > d.id;
+            GET DIAGNOSTICS removed = ROW_COUNT;
+            IF EXISTS (
+                SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE c.relname = 'ix_{table}_post_user' AND NOT i.indisunique
+            ) THEN
+                DROP INDEX ix_{table}_post_user;
+            END IF;
+            CREATE UNIQUE INDEX IF NOT EXISTS ix_{table}_post_user ON {table} (post_id, user_id);
+            IF removed > 0 AND EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name='posts' AND column_name='registration_count'
+            ) THEN
+                {recount}
+            END IF;
+        END$$"""
+            for table, recount in (
+                (
+                    "post_reactions",
+                    """UPDATE posts SET
+                    like_count = (SELECT count(*) FROM post_reactions r
+                                  WHERE r.post_id = posts.id AND r.reaction_type = 'like'),
+                    dislike_count = (SELECT count(*) FROM post_reactions r
+                                     WHERE r.post_id = posts.id AND r.reaction_type = 'dislike');""",
+                ),
+                ("post_bookmarks", "NULL;"),
+                (
+                    "post_registrations",
+                    """UPDATE posts SET
+                    registration_count = (SELECT count(*) FROM post_registrations g WHERE g.post_id = posts.id);""",
+                ),
+            )
+        ],
+
+        # POST COUNTERS: kolom ditambahkan + di-backfill sekali, saat registration_count belum ada
+        """DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name='posts' AND column_name='registration_count'
+            ) THEN
+                ALTER TABLE posts
+                    ADD COLUMN IF NOT EXISTS like_count INTEGER DEFAULT 0,
+                    ADD COLUMN IF NOT EXISTS dislike_count INTEGER DEFAULT 0,
+                    ADD COLUMN registration_count INTEGER DEFAULT 0;
+                UPDATE posts SET
+                    like_count = (SELECT count(*) FROM post_reactions r
+                                  WHERE r.post_id = posts.id AND r.reaction_type = 'like'),
+                    dislike_count = (SELECT count(*) FROM post_reactions r
+                                     WHERE r.post_id = posts.id AND r.reaction_type = 'dislike'),
+                    registration_count = (SELECT count(*) FROM post_registrations g WHERE g.post_id = posts.id);
+            END IF;
+        END$$""",
+
         # POST REGISTRATIONS
         """CREATE TABLE IF NOT EXISTS post_registrations (
             id          SERIAL PRIMARY KEY,
@@ -4537,6 +5294,37 @@ def run_migrations():
             content     TEXT NOT NULL,
             created_at  TIMESTAMP WITHOUT TIME ZONE DEFAULT NOW()
         )""",
+        "ALTER TABLE post_comments ADD COLUMN IF NOT EXISTS content_html TEXT",
+        # Backfill setara _comment_html(): escape markupsafe lalu newline -> <br>
+        """UPDATE post_comments SET content_html = replace(
+            replace(replace(replace(replace(replace(content, '&', '&amp;'), '<', '&lt;'), '>', '&gt;'),
+                    '"', '&#34;'), '''', '&#39;'),
+            chr(10), '<br>')
+        WHERE content_html IS NULL""",
+        # Integritas balasan dijaga Postgres (news_comment tidak lagi SELECT parent dulu).
+        # Parent yang hilang / beda post di data lama dijadikan komentar top-level.
+        """DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_post_comments_id_post') THEN
+                ALTER TABLE post_comments ADD CONSTRAINT uq_post_comments_id_post UNIQUE (id, post_id);
+            END IF;
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'fk_post_comments_parent') THEN
+                UPDATE post_comments c SET parent_id = NULL
+                WHERE c.parent_id IS NOT NULL AND NOT EXISTS (
+                    SELECT 1 FROM post_comments p WHERE p.id = c.parent_id AND p.post_id = c.post_id
+                );
+                ALTER TABLE post_comments ADD CONSTRAINT fk_post_comments_parent
+                    FOREIGN KEY (parent_id, post_id) REFERENCES post_comments (id, post_id) ON DELETE CASCADE;
+            END IF;
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint
+                WHERE conrelid = 'post_comments'::regclass AND confrelid = 'posts'::regclass AND contype = 'f'
+            ) THEN
+                -- NOT VALID: hanya baris baru yang dicek, komentar lama tidak memblokir migrasi
+                ALTER TABLE post_comments ADD CONSTRAINT fk_post_comments_post
+                    FOREIGN KEY (post_id) REFERENCES posts (id) ON DELETE CASCADE NOT VALID;
+            END IF;
+        END$$""",
 
         # POST REACTIONS
         """CREATE TABLE IF NOT EXISTS post_reactions (
@@ -4560,6 +5348,9 @@ def run_migrations():
             admin_note  TEXT
         )""",
         "ALTER TABLE tickets ADD COLUMN IF NOT EXISTS assigned_admin_id INTEGER",
+        "CREATE INDEX IF NOT EXISTS ix_ticket_user_created ON tickets USING btree (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_ticket_status_created ON tickets USING btree (status, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_ticket_assigned_admin ON tickets USING btree (assigned_admin_id)",
 # POST BOOKMARKS
         """CREATE TABLE IF NOT EXISTS post_bookmarks (
             id          SERIAL PRIMARY KEY,
@@ -4568,22 +5359,54 @@ def run_migrations():
             created_at  TIMESTAMP WITHOUT TIME ZONE DEFAULT NOW()
         )""",
 
+        # POST INDEXES
+        "CREATE INDEX IF NOT EXISTS ix_posts_published_created ON posts (is_published, created_at DESC)",
+        "CREATE INDEX IF NOT EXISTS ix_post_comments_post_created ON post_comments (post_id, created_at)",
+
     ]
 
-    # Eksekusi satu per satu, abaikan error kecil supaya tidak mengganggu startup
+    mark_version = text(
+        "INSERT INTO settings (key, value) VALUES (:key, :value) "
+        "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value"
+    )
+    version_params = {"key": SCHEMA_VERSION_KEY, "value": SCHEMA_VERSION}
+
+    # Semua DDL dikirim sebagai satu batch multi-statement (satu round-trip, satu transaksi)
+    try:
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql(";\n".join(stmts))
+            conn.execute(mark_version, version_params)
+        return
+    except Exception as e:  # pragma: no cover - hanya logging ringan
+        # e.orig: pesan error DB saja, tanpa seluruh batch SQL
+        print(f"[MIGRATION WARN] batch gagal, jalankan per statement: {getattr(e, 'orig', e)}")
+
+    # Fallback: satu per satu dalam SAVEPOINT, abaikan error kecil supaya tidak mengganggu startup
+    failed = False
     with db.engine.begin() as conn:
         for sql in stmts:
             try:
-                conn.execute(text(sql))
+                with conn.begin_nested():
+                    conn.execute(text(sql))
             except Exception as e:  # pragma: no cover - hanya logging ringan
+                failed = True
                 print(f"[MIGRATION WARN] {e}")
+        if not failed:
+            conn.execute(mark_version, version_params)
 
 
 def init_db():
+    # Skema sudah versi terbaru (proses/worker kedua dst.): lewati DO-block, create_all
+    # dan run_migrations yang semuanya membaca katalog sistem
+    if _schema_is_current():
+        return
+
+    # Buat semua tabel dari model (aman jika sudah ada); harus sebelum ALTER tickets di bawah
+    db.create_all()
 
-    # Auto-add missing columns
+    # Auto-add missing columns (engine.begin: DDL di-commit, bukan di-rollback saat koneksi ditutup)
     from sqlalchemy import text as _text
-    with db.engine.connect() as conn:
+    with db.engine.begin() as conn:
         conn.execute(_text("""
         DO $$
         BEGIN
@@ -4608,12 +5431,10 @@ def init_db():
         END$$;
         """))
 
-    # Buat semua tabel dari model (aman jika sudah ada)
-    db.create_all()
     # Jalankan auto-migration sederhana untuk kolom/tabel yang mungkin belum ada
     run_migrations()
     # Inisialisasi setting default
-    if not Setting.query.filter_by(key="allow_admin_signup").first():
+    if db.session.query(Setting.id).filter_by(key="allow_admin_signup").first() is None:
         set_setting("allow_admin_signup", "false")
 
 # Chat API routes added
@@ -4621,35 +5442,48 @@ def init_db():
 @login_required
 def chat_messages(ticket_id):
     user = current_user()
-    ticket = Ticket.query.get_or_404(ticket_id)
+    ticket = db.session.get(Ticket, ticket_id, options=[load_only(Ticket.id, Ticket.user_id)]) or abort(404)
     # Hanya admin atau pemilik tiket yang boleh mengakses
     if user.role != "admin" and ticket.user_id != user.id:
         return jsonify([])
-    msgs = TicketMessage.query.filter_by(ticket_id=ticket_id).order_by(TicketMessage.created_at.asc()).all()
 
-    # Tandai pesan sebagai sudah dibaca untuk sisi yang membuka percakapan
-    changed = False
-    if user.role == "admin":
-        for m in msgs:
-            if m.sender_id != user.id and not m.is_read_admin:
-                m.is_read_admin = True
-                changed = True
-    else:
-        for m in msgs:
-            if m.sender_id != user.id and not m.is_read_user:
-                m.is_read_user = True
-                changed = True
-    if changed:
+    # Tandai pesan sebagai sudah dibaca untuk sisi yang membuka percakapan:
+    # satu UPDATE ... WHERE, dijalankan sebelum SELECT agar commit tidak meng-expire msgs
+    read_col = TicketMessage.is_read_admin if user.role == "admin" else TicketMessage.is_read_user
+    updated = TicketMessage.query.filter(
+        TicketMessage.ticket_id == ticket_id,
+        TicketMessage.sender_id != user.id,
+        db.or_(read_col.is_(None), read_col == false()),
+    ).update({read_col: True}, synchronize_session=False)
+    if updated:
         db.session.commit()
 
+    # ?since=<id terakhir>: polling hanya mengambil pesan baru, bukan seluruh riwayat
+    since = request.args.get("since", 0, type=int)
+    # Nama pengirim ikut di-JOIN: tanpa lazy load m.sender per pesan
+    msgs = (
+        db.session.query(
+            TicketMessage.id,
+            TicketMessage.sender_id,
+            TicketMessage.message,
+            TicketMessage.created_at,
+            User.full_name,
+        )
+        .outerjoin(User, TicketMessage.sender_id == User.id)
+        .filter(TicketMessage.ticket_id == ticket_id, TicketMessage.id > since)
+        .order_by(TicketMessage.id.asc())
+        .all()
+    )
+
     return jsonify([
         {
-            "sender": m.sender.full_name if m.sender else "",
-            "me": m.sender_id == user.id,
-            "text": m.message,
-            "time": m.created_at.astimezone(WIB).strftime("%d %b %Y, %H:%M WIB") if m.created_at else ""
+            "id": mid,
+            "sender": sender_name or "",
+            "me": sender_id == user.id,
+            "text": message,
+            "time": _fmt_wib(created_at, "%d %b %Y, %H:%M WIB") if created_at else ""
         }
-        for m in msgs
+        for mid, sender_id, message, created_at, sender_name in msgs
     ])
 
 
@@ -4657,7 +5491,7 @@ def chat_messages(ticket_id):
 @login_required
 def chat_send(ticket_id):
     user = current_user()
-    ticket = Ticket.query.get_or_404(ticket_id)
+    ticket = db.session.get(Ticket, ticket_id, options=[load_only(Ticket.id, Ticket.user_id)]) or abort(404)
     # Hanya admin atau pemilik tiket yang boleh mengirim pesan
     if user.role != "admin" and ticket.user_id != user.id:
         return jsonify({"success": False})